@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to activate a video
 #===========================================
+@incremental(resume=True)
 def activate_video(video: dict):
 	"""
 	If video is inactive this will activate it.
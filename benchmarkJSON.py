@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the JSON decoding of recorded API payloads, comparing the json module
+from the standard library with the backend used by brightcove.Decoder.
+
+Record a payload, for example a CMS page of 100 videos:
+    curl -H "Authorization: Bearer $TOKEN" "https://cms.api.brightcove.com/v1/accounts/$ACCOUNT/videos?limit=100" > page.json
+
+Then run:
+    python3 benchmarkJSON.py page.json [more payload files]
+"""
+import sys
+import json
+import argparse
+import timeit
+from brightcove import Decoder
+from brightcove.utils import eprint
+
+def benchmark(filename: str, repeat: int) -> None:
+    """
+    Decodes a payload file with both decoders and prints the timings.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            payload = file.read()
+    except OSError as e:
+        eprint(f'Error: unable to read {filename} -> {e}')
+        return
+
+    stdlib = min(timeit.repeat(lambda: json.loads(payload), number=repeat, repeat=5)) / repeat
+    fast = min(timeit.repeat(lambda: Decoder.loads(payload), number=repeat, repeat=5)) / repeat
+    print(f'{filename}, {len(payload)/1024:.1f} KB, json: {stdlib*1000:.3f} ms, {Decoder.BACKEND}: {fast*1000:.3f} ms, speedup: {stdlib/fast:.2f}x')
+
+#===========================================
+# only run code if it's not imported
+#===========================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog=sys.argv[0])
+    parser.add_argument('files', metavar='<payload file>', type=str, nargs='+', help='Recorded JSON API response(s)')
+    parser.add_argument('-n', type=int, default=100, help='Number of decodes per measurement')
+    args = parser.parse_args()
+
+    if Decoder.BACKEND == 'json':
+        eprint('Warning: no fast JSON backend installed (pip3 install orjson), both timings use the standard library.')
+
+    for payload_file in args.files:
+        benchmark(payload_file, args.n)
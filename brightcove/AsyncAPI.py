@@ -0,0 +1,332 @@
+"""
+Asynchronous twins of all API wrapper classes.
+
+Every twin has the same methods and arguments as the wrapper class it is based on,
+but the methods have to be awaited:
+
+	async with AsyncCMS(oauth) as cms:
+		response = await cms.GetVideos(page_size=100)
+
+Requires aiohttp: pip3 install aiohttp
+"""
+
+import asyncio
+import functools
+from os.path import basename
+from typing import Callable, Optional, Tuple, cast
+from requests.models import Response
+from requests_toolbelt import MultipartEncoder # type: ignore
+from .AsyncBase import AsyncBase
+from .OAuth import OAuth
+from .Analytics import Analytics
+from .Audience import Audience
+from .Audit import Blacklist as Audit
+from .Blacklist import Blacklist
+from .CMS import CMS
+from .DeliveryRules import DeliveryRules
+from .DeliverySystem import DeliverySystem
+from .DynamicIngest import DynamicIngest
+from .EPG import EPG
+from .IngestProfiles import IngestProfiles
+from .Key import Key
+from .Live import Live
+from .PlaybackDevices import PlaybackDevices
+from .PlaybackRights import PlaybackRights
+from .PlayerManagement import PlayerManagement
+from .Social import Social
+from .SocialSyndication import SocialSyndication
+from .XDR import XDR
+
+class AsyncAnalytics(AsyncBase, Analytics):
+	"""
+	Asynchronous twin of the Analytics class.
+	"""
+
+class AsyncAudience(AsyncBase, Audience):
+	"""
+	Asynchronous twin of the Audience class.
+	"""
+
+class AsyncAudit(AsyncBase, Audit):
+	"""
+	Asynchronous twin of the Audit class.
+	"""
+
+class AsyncBlacklist(AsyncBase, Blacklist):
+	"""
+	Asynchronous twin of the Blacklist class.
+	"""
+
+class AsyncCMS(AsyncBase, CMS):
+	"""
+	Asynchronous twin of the CMS class.
+	"""
+
+	async def GetVideoCount(self, search_query: str='', account_id: str='') -> int: # type: ignore[override]
+		"""
+		Gets count of videos for the account or a search.
+
+		Args:
+			search_query (str, optional): Search query. Defaults to ''.
+			account_id (str, optional): Brightcove Account ID. Defaults to ''.
+
+		Returns:
+			int: Number of videos in account, -1 if error occured.
+		"""
+		search_query = search_query or self.search_query
+		url = f'{self.base_url}/videos/count?q={search_query}'.format(account_id=account_id or self.oauth.account_id)
+		response = await self.session.get(url, headers=self.oauth.headers) # type: ignore
+		if response.status_code == 200:
+			return int(response.json().get('count'))
+		return -1
+
+class AsyncDeliveryRules(AsyncBase, DeliveryRules):
+	"""
+	Asynchronous twin of the DeliveryRules class.
+	"""
+
+	async def DeliveryRulesEnabled(self, account_id: str='') -> bool: # type: ignore[override]
+		"""
+		Check if an account has Delivery Rules enabled.
+
+		Args:
+			account_id (str, optional): Account ID to check. Defaults to ''.
+
+		Returns:
+			bool: True if account is enabled for Delivery Rules. False otherwise
+		"""
+		return (await self.GetDeliveryRules(account_id=account_id)).status_code == 200 # type: ignore
+
+class AsyncDeliverySystem(AsyncBase, DeliverySystem):
+	"""
+	Asynchronous twin of the DeliverySystem class.
+
+	aiohttp can't send the MultipartEncoder body of a file upload, so it is read
+	into memory in a worker thread and sent as bytes.
+	"""
+
+	@staticmethod
+	def _read_upload(file_name: str) -> Tuple[bytes, str]:
+		"""
+		Returns the multipart body uploading a file and its content type.
+		"""
+		with open(file_name, 'rb') as file:
+			upload_data = MultipartEncoder( fields={'contents': (None, file, 'text/plain')} )
+			return upload_data.to_string(), upload_data.content_type
+
+	async def AddFileToRepository(self, repo_name: str, file_name: str, account_id: str='') -> Response: # type: ignore[override]
+		"""
+		Upload a file to a repository.
+
+		Args:
+			repo_name (str): name of the repository.
+			file_name (str): name of the file to upload.
+			account_id (str, optional): Brightcove Video Cloud account ID. Defaults to ''.
+
+		Returns:
+			Response: API response as requests Response object.
+		"""
+		url = f'{self.base_url}/{repo_name}/files/{basename(file_name)}'.format(account_id=account_id or self.oauth.account_id)
+		body, content_type = await asyncio.to_thread(self._read_upload, file_name)
+		headers = { 'Authorization': f'Bearer {self.oauth.access_token}', 'Content-Type': content_type }
+		return await self.session.put(url, headers=headers, data=body) # type: ignore
+
+class AsyncDynamicIngest(AsyncBase, DynamicIngest):
+	"""
+	Asynchronous twin of the DynamicIngest class.
+
+	Ingest profile verification and the S3 upload are blocking operations and
+	are run in a worker thread so they don't stall the event loop.
+	"""
+
+	async def _async_verify_profile(self, account_id: str, profile_id: str) -> None:
+		"""
+		Warms up the _verify_profile cache without blocking the event loop.
+		"""
+		await asyncio.to_thread(functools.partial(self._verify_profile, account_id=account_id, profile_id=profile_id))
+
+	async def RetranscodeVideo(self, video_id: str, profile_id: str='', capture_images: bool=True, priority_queue: str='', callbacks: Optional[list]=None, account_id: str='') -> Response: # type: ignore[override]
+		"""
+		Trigger retranscode for a video using the digital master.
+
+		Args:
+			video_id (str): Video ID to retranscode.
+			profile_id (str, optional): Ingest profile to use for retranscode. Defaults to ''.
+			capture_images (bool, optional): Flag to see if new images should be captured. Defaults to True.
+			priority_queue (str, optional): Priority queue to use for retranscode. Defaults to ''.
+			callbacks (Optional[list], optional): List of URLs to use for notification callbacks. Defaults to None.
+			account_id (str, optional): Video Cloud account ID. Defaults to ''.
+
+		Returns:
+			Response: API response as requests Response object.
+		"""
+		account_id = account_id or self.oauth.account_id
+		await self._async_verify_profile(account_id=account_id, profile_id=profile_id)
+		return await super().RetranscodeVideo(video_id=video_id, profile_id=profile_id, capture_images=capture_images, # type: ignore
+			priority_queue=priority_queue, callbacks=callbacks, account_id=account_id)
+
+	async def SubmitIngest(self, video_id: str, source_url: str, capture_images: bool=True, priority_queue: str='', callbacks: Optional[list]=None, profile_id: str='', account_id: str='') -> Response: # type: ignore[override]
+		"""
+		Submits an ingest request to the Dynamic Ingest API.
+
+		Args:
+			video_id (str): Video ID to ingest video to.
+			source_url (str): URL of the source video asset to ingest.
+			capture_images (bool, optional): Flag to see if images should be captured. Defaults to True.
+			priority_queue (str, optional): Priority queue to use for ingest. Defaults to ''.
+			callbacks (Optional[list], optional): List of URLs to use for notification callbacks. Defaults to None.
+			account_id (str, optional): Video Cloud account ID. Defaults to ''.
+
+		Returns:
+			Response: API response as requests Response object.
+		"""
+		account_id = account_id or self.oauth.account_id
+		await self._async_verify_profile(account_id=account_id, profile_id=profile_id)
+		return await super().SubmitIngest(video_id=video_id, source_url=source_url, capture_images=capture_images, # type: ignore
+			priority_queue=priority_queue, callbacks=callbacks, profile_id=profile_id, account_id=account_id)
+
+	async def UploadFile(self, video_id: str, file_name: str, callback: Optional[Callable]=None, account_id: str='') -> dict: # type: ignore[override]
+		"""
+		Upload the contents of a local file to a temporary S3 bucket provided by Brightcove using
+		the boto3 library to perform a multipart upload.
+
+		Args:
+			video_id (str): Video ID to use for upload.
+			file_name (str): Path and name of file to upload.
+			callback (Optional[Callable], optional): Callback function for progress reporting. Defaults to None.
+			account_id (str, optional): Video Cloud account ID. Defaults to ''.
+
+		Returns:
+			dict: Dictionary with the relevant URLs returned by the CMS API. Empty in case of an error.
+		"""
+		url = f'{CMS.base_url}/videos/{video_id}/upload-urls/{file_name}'.format(account_id=account_id or self.oauth.account_id)
+		response = await self.session.get(url=url, headers=self.oauth.headers) # type: ignore
+		if response.status_code in DynamicIngest.success_responses:
+			return await asyncio.to_thread(self._upload_to_s3, upload_urls_response=response.json(), file_name=file_name, callback=callback)
+		return {}
+
+class AsyncEPG(AsyncBase, EPG):
+	"""
+	Asynchronous twin of the EPG class.
+	"""
+
+class AsyncIngestProfiles(AsyncBase, IngestProfiles):
+	"""
+	Asynchronous twin of the IngestProfiles class.
+	"""
+
+	def __init__(self, oauth: OAuth) -> None:
+		"""
+		Args:
+			oauth (OAuth): OAuth instance to use for the API calls.
+		"""
+		super().__init__(oauth=oauth)
+		# cache for ProfileExists
+		self.__previousProfile = ''
+		self.__previousAccount = ''
+		# cache for GetDefaultProfile
+		self.__defaultProfileResponse = cast(Response, None)
+		self.__defaultProfileAccount = ''
+		# cache for GetProfile
+		self.__getProfileAccount = ''
+		self.__getProfileID = ''
+		self.__getProfileResponse = cast(Response, None)
+
+	async def GetDefaultProfile(self, account_id: str='') -> Response: # type: ignore[override]
+		"""
+		Gets the list of default profiles from an account.
+
+		Args:
+			account_id (str, optional): Account ID to get the ingest profiles from. Defaults to ''.
+
+		Returns:
+			Response: API response as requests Response object.
+		"""
+		account_id = account_id or self.oauth.account_id
+		if account_id != self.__defaultProfileAccount:
+			url = f'{self.base_url}/configuration'.format(account_id=account_id)
+			self.__defaultProfileResponse = await self.session.get(url=url, headers=self.oauth.headers) # type: ignore
+			self.__defaultProfileAccount = account_id
+		return self.__defaultProfileResponse
+
+	async def GetIngestProfile(self, profile_id: str, account_id: str='') -> Response: # type: ignore[override]
+		"""
+		Gets a specific ingest profile from an account.
+
+		Args:
+			profile_id (str): ID of ingest profile to retrieve.
+			account_id (str, optional): Account ID to get the ingest profile from. Defaults to ''.
+
+		Returns:
+			Response: API response as requests Response object.
+		"""
+		account_id = account_id or self.oauth.account_id
+		if self.__getProfileAccount != account_id or self.__getProfileID != profile_id:
+			url = f'{self.base_url}/profiles/{profile_id}'.format(account_id=account_id)
+			self.__getProfileResponse = await self.session.get(url=url, headers=self.oauth.headers) # type: ignore
+			self.__getProfileID = profile_id
+			self.__getProfileAccount = account_id
+		return self.__getProfileResponse
+
+	async def ProfileExists(self, profile_id: str, account_id: str='') -> bool: # type: ignore[override]
+		"""
+		Checks if a give ingest profile ID exists in an account.
+
+		Args:
+			profile_id (str): ID of ingest profile to check if it exists.
+			account_id (str, optional): Account ID to check if profile exists. Defaults to ''.
+
+		Returns:
+			bool: True if ingest profile exists, False otherwise.
+		"""
+		account_id = account_id or self.oauth.account_id
+		if self.__previousProfile == profile_id and self.__previousAccount == account_id:
+			return True
+
+		response = await self.GetIngestProfile(account_id=account_id, profile_id=profile_id)
+		if response.status_code in IngestProfiles.success_responses:
+			self.__previousProfile = profile_id
+			self.__previousAccount = account_id
+			return True
+
+		return False
+
+class AsyncKey(AsyncBase, Key):
+	"""
+	Asynchronous twin of the Key class.
+	"""
+
+class AsyncLive(AsyncBase, Live):
+	"""
+	Asynchronous twin of the Live class.
+	"""
+
+class AsyncPlaybackDevices(AsyncBase, PlaybackDevices):
+	"""
+	Asynchronous twin of the PlaybackDevices class.
+	"""
+
+class AsyncPlaybackRights(AsyncBase, PlaybackRights):
+	"""
+	Asynchronous twin of the PlaybackRights class.
+	"""
+
+class AsyncPlayerManagement(AsyncBase, PlayerManagement):
+	"""
+	Asynchronous twin of the PlayerManagement class.
+	"""
+
+class AsyncSocial(AsyncBase, Social):
+	"""
+	Asynchronous twin of the Social class.
+	"""
+
+class AsyncSocialSyndication(AsyncBase, SocialSyndication):
+	"""
+	Asynchronous twin of the SocialSyndication class.
+	"""
+
+class AsyncXDR(AsyncBase, XDR):
+	"""
+	Asynchronous twin of the XDR class.
+	"""
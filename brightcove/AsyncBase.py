@@ -0,0 +1,250 @@
+"""
+Asynchronous counterpart of the Base class. Wrapper classes inheriting from
+AsyncBase return awaitables instead of responses, so a single event loop can
+keep many API calls in flight without using a thread per call.
+
+Requires aiohttp: pip3 install aiohttp
+"""
+
+import time
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Tuple
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from .Base import Base, COALESCE_METHODS, coalesce_key, is_related_url
+from .RateLimiter import get_rate_limiter
+from .ConnectionPool import get_pool_maxsize
+from .Decoder import install_decoder
+from .SingleFlight import AsyncSingleFlight
+from .Instrumentation import RequestEvent, account_id_of, body_size, calling_wrapper, emit, endpoint_template, has_request_hooks
+
+try:
+	import aiohttp # pip3 install aiohttp
+except ImportError:
+	aiohttp = None # type: ignore
+
+async_logger = logging.getLogger(__name__)
+
+# aiohttp client sessions (connection pools) shared by all asynchronous wrappers, one per event loop
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]' = weakref.WeakKeyDictionary()
+
+# identical GET requests which are in flight at the same time are only sent once per event loop
+_in_flight = AsyncSingleFlight()
+
+class AsyncSession():
+	"""
+	Minimal asyncio session with the same call signature as a requests Session.
+
+	All request methods return awaitables which resolve into requests Response
+	objects, so code written for the blocking wrappers can consume the results
+	without any changes.
+	"""
+
+	def __init__(self, owner: Base) -> None:
+		"""
+		Args:
+			owner (Base): API wrapper instance the session belongs to.
+		"""
+		if aiohttp is None:
+			raise ImportError('The asynchronous API wrappers require aiohttp (pip3 install aiohttp).')
+		self.owner = owner
+
+	@staticmethod
+	def _get_client() -> Any:
+		"""
+		Returns the shared aiohttp ClientSession for the running event loop. Creates one if needed.
+		"""
+		loop = asyncio.get_running_loop()
+		client = _clients.get(loop)
+		if client is None or client.closed:
+			connector = aiohttp.TCPConnector(limit=get_pool_maxsize(), keepalive_timeout=30)
+			client = aiohttp.ClientSession(connector=connector)
+			_clients[loop] = client
+		return client
+
+	@staticmethod
+	def _to_response(client_response: Any, content: bytes) -> Response:
+		"""
+		Converts an aiohttp ClientResponse into a requests Response.
+		"""
+		response = Response()
+		response.status_code = client_response.status
+		response.reason = client_response.reason
+		response.url = str(client_response.url)
+		response.headers = CaseInsensitiveDict(client_response.headers)
+		response.encoding = client_response.charset
+		response._content = content # pylint: disable=protected-access
+		return response
+
+	def request(self, method: str, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Returns an awaitable performing an HTTP request which resolves into a requests Response.
+		"""
+		# the calling wrapper method is only on the stack now, not when the request is awaited
+		wrapper = calling_wrapper(self.owner) if has_request_hooks() else ''
+		return self.__request(method.upper(), url, wrapper, **kwargs)
+
+	async def __request(self, method: str, url: str, wrapper: str, **kwargs) -> Response:
+		"""
+		Performs an HTTP request and emits a RequestEvent to the registered request hooks.
+		"""
+		if not wrapper:
+			return (await self.__process(method, url, **kwargs))[0]
+
+		start = time.perf_counter()
+		try:
+			response, retries = await self.__process(method, url, **kwargs)
+		except Exception:
+			emit(RequestEvent(wrapper=wrapper, method=method, endpoint=endpoint_template(url), status=-1,
+				latency=time.perf_counter()-start, bytes_in=0, bytes_out=body_size(kwargs.get('data')), retries=0, from_cache=False, account_id=account_id_of(url)))
+			raise
+		emit(RequestEvent(wrapper=wrapper, method=method, endpoint=endpoint_template(url), status=response.status_code,
+			latency=time.perf_counter()-start, bytes_in=len(response.content), bytes_out=body_size(kwargs.get('data')),
+			retries=retries, from_cache=getattr(response, 'from_cache', False), account_id=account_id_of(url)))
+		return response
+
+	async def __process(self, method: str, url: str, **kwargs) -> Tuple[Response, int]:
+		"""
+		Performs an HTTP request, answering it from the owner's response cache if possible.
+		Returns the response and the number of retries it took.
+		"""
+		cache = self.owner.get_response_cache(method, url)
+		headers = kwargs.get('headers')
+		conditional_headers: dict = {}
+		if cache:
+			cached_response, conditional_headers = cache.lookup(url)
+			if cached_response is not None:
+				return self.__finish(cached_response), 0
+			if conditional_headers:
+				kwargs['headers'] = {**(headers or {}), **conditional_headers}
+
+		response, retries = await self.__coalesce(method, url, **kwargs)
+
+		if cache:
+			response = cache.update(url, response)
+			# the entry was evicted while the request was in flight, get the full response instead
+			if response.status_code == 304 and conditional_headers:
+				kwargs['headers'] = headers
+				response, more_retries = await self.__coalesce(method, url, **kwargs)
+				response, retries = cache.update(url, response), retries + more_retries
+		elif method != 'GET' and self.owner.response_cache and response.ok:
+			self.owner.response_cache.invalidate(url)
+		if method not in COALESCE_METHODS and response.ok:
+			# requests sent after a write must not share the response of one sent before it
+			_in_flight.forget(lambda key: is_related_url(key[1], url))
+		return self.__finish(response), retries
+
+	async def __coalesce(self, method: str, url: str, **kwargs) -> Tuple[Response, int]:
+		"""
+		Sends a request, sharing the response of an identical request in flight if the owner coalesces requests.
+		"""
+		if self.owner.coalesce_requests and method in COALESCE_METHODS:
+			return await _in_flight.do(coalesce_key(method, url, kwargs), lambda: self.__send(method, url, **kwargs))
+		return await self.__send(method, url, **kwargs)
+
+	def __finish(self, response: Response) -> Response:
+		"""
+		Applies the owner's response settings.
+		"""
+		return install_decoder(response) if self.owner.fast_json else response
+
+	async def __send(self, method: str, url: str, **kwargs) -> Tuple[Response, int]:
+		"""
+		Sends a request, waiting for the host's rate limiter and retrying it as long as the retry policy allows.
+		Returns the response and the number of retries it took.
+		"""
+		policy = self.owner.get_retry_policy(method, url)
+		attempt = 0
+		while True:
+			if limiter := get_rate_limiter(url):
+				await limiter.acquire_async()
+			try:
+				client = self._get_client()
+				async with client.request(method, url, **kwargs) as client_response:
+					content = await client_response.read()
+			except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+				if not policy.should_retry(method, attempt):
+					raise
+				delay = policy.get_delay(attempt)
+				async_logger.info('%s %s failed (%s) -> retry %d in %.2fs', method, url, e, attempt+1, delay)
+			else:
+				response = self._to_response(client_response, content)
+				if not policy.should_retry(method, attempt, response.status_code):
+					return response, attempt
+				delay = policy.get_delay(attempt, response.headers)
+				async_logger.info('%s %s returned %d -> retry %d in %.2fs', method, url, response.status_code, attempt+1, delay)
+			await asyncio.sleep(delay)
+			attempt += 1
+
+	def get(self, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Sends a GET request.
+		"""
+		return self.request('GET', url, **kwargs)
+
+	def post(self, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Sends a POST request.
+		"""
+		return self.request('POST', url, **kwargs)
+
+	def put(self, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Sends a PUT request.
+		"""
+		return self.request('PUT', url, **kwargs)
+
+	def patch(self, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Sends a PATCH request.
+		"""
+		return self.request('PATCH', url, **kwargs)
+
+	def delete(self, url: str, **kwargs) -> Awaitable[Response]:
+		"""
+		Sends a DELETE request.
+		"""
+		return self.request('DELETE', url, **kwargs)
+
+	@staticmethod
+	async def close() -> None:
+		"""
+		Closes the connection pool of the running event loop. It is shared by all asynchronous
+		wrappers on the loop and will be recreated if one of them makes another request.
+		"""
+		client = _clients.pop(asyncio.get_running_loop(), None)
+		if client is not None and not client.closed:
+			await client.close()
+
+class AsyncBase(Base):
+	"""
+	Abstract base class for the asynchronous twins of the API wrapper classes.
+
+	A twin is declared by putting AsyncBase in front of the blocking wrapper class:
+
+		class AsyncCMS(AsyncBase, CMS): ...
+
+	Every method of the wrapper which returns the result of a session call then
+	returns an awaitable instead. Methods which post-process the response have to
+	be overridden in the twin.
+	"""
+
+	def _get_session(self) -> AsyncSession: # type: ignore[override]
+		"""
+		Returns an asynchronous session using the shared connection pool and the instances retry policies.
+		"""
+		return AsyncSession(owner=self)
+
+	async def close(self) -> None:
+		"""
+		Closes the connection pool shared by all asynchronous wrappers on the running event loop.
+		"""
+		await self.session.close() # type: ignore
+
+	async def __aenter__(self):
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, exc_traceback):
+		await self.close()
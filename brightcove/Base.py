@@ -3,10 +3,177 @@ Abstract base class all API wrapper classes have to inherit from.
 """
 
 from abc import ABC, abstractproperty
-from typing import Union, Optional
+from typing import Any, Dict, List, Tuple, Union, Optional
+import re
 import json
+import time
+import logging
 import requests
+from requests.models import Response
 from .OAuth import OAuth
+from .Retry import RetryPolicy
+from .RateLimiter import TokenBucket, get_rate_limiter, set_rate_limit
+from .ConnectionPool import PooledSession
+from .Decoder import decode_response, install_decoder
+from .ResponseCache import ResponseCache
+from .SingleFlight import SingleFlight
+from .Instrumentation import RequestEvent, account_id_of, body_size, calling_wrapper, emit, endpoint_template, has_request_hooks
+
+base_logger = logging.getLogger(__name__)
+
+# identical GET requests which are in flight at the same time are only sent once per process
+_in_flight = SingleFlight()
+
+# HTTP methods whose concurrent identical requests can be merged
+COALESCE_METHODS = ('GET', 'HEAD')
+
+def coalesce_key(method: str, url: str, kwargs: dict) -> tuple:
+	"""
+	Returns the key identifying identical requests.
+	"""
+	headers = kwargs.get('headers') or {}
+	return (method, url, tuple(sorted(headers.items())), repr(kwargs.get('params')))
+
+def is_related_url(url: str, other_url: str) -> bool:
+	"""
+	Checks if a URL is the other URL, one of its parents or one of its sub-resources, ignoring query strings.
+	"""
+	url, other_url = url.split('?')[0], other_url.split('?')[0]
+	return url.startswith(other_url) or other_url.startswith(url)
+
+def body_streams(kwargs: dict) -> Optional[List[Tuple[Any, int]]]:
+	"""
+	Returns the file-like objects in the body of a request with their current positions,
+	so they can be rewound before the request is sent again. Returns None if the body
+	can only be read once (e.g. a MultipartEncoder or a generator).
+	"""
+	bodies = [kwargs.get('data')]
+	files = kwargs.get('files') or {}
+	# files are a dict or a list of (field, file) pairs, a file can be a (filename, file, ...) tuple
+	for item in (files.values() if isinstance(files, dict) else [pair[1] for pair in files]):
+		bodies.append(item[1] if isinstance(item, tuple) else item)
+	streams = []
+	for body in bodies:
+		if body is None or isinstance(body, (str, bytes, bytearray, dict, list, tuple)):
+			continue
+		try:
+			if not body.seekable():
+				return None
+			streams.append((body, body.tell()))
+		except (AttributeError, OSError, ValueError):
+			return None
+	return streams
+
+class APISession(PooledSession):
+	"""
+	requests Session which sends every request through the owner's response cache, request
+	coalescing, the host's rate limiter and a RetryPolicy, reporting it to the request hooks.
+	Uses the process-wide connection pools.
+	"""
+
+	def __init__(self, owner: 'Base') -> None:
+		"""
+		Args:
+			owner (Base): API wrapper instance the session belongs to.
+		"""
+		super().__init__()
+		self.owner = owner
+
+	def request(self, method: str, url: str, *args, **kwargs) -> Response: # type: ignore[override]
+		"""
+		Sends a request and emits a RequestEvent to the registered request hooks.
+		"""
+		method = method.upper()
+		if not has_request_hooks():
+			return self.__process(method, url, *args, **kwargs)[0]
+
+		wrapper = calling_wrapper(self.owner)
+		start = time.perf_counter()
+		try:
+			response, retries = self.__process(method, url, *args, **kwargs)
+		except Exception:
+			emit(RequestEvent(wrapper=wrapper, method=method, endpoint=endpoint_template(url), status=-1,
+				latency=time.perf_counter()-start, bytes_in=0, bytes_out=body_size(kwargs.get('data')), retries=0, from_cache=False, account_id=account_id_of(url)))
+			raise
+		emit(RequestEvent(wrapper=wrapper, method=method, endpoint=endpoint_template(url), status=response.status_code,
+			latency=time.perf_counter()-start, bytes_in=len(response.content), bytes_out=body_size(kwargs.get('data')),
+			retries=retries, from_cache=getattr(response, 'from_cache', False), account_id=account_id_of(url)))
+		return response
+
+	def __process(self, method: str, url: str, *args, **kwargs) -> Tuple[Response, int]:
+		"""
+		Sends a request, answering it from the response cache if possible.
+		Returns the response and the number of retries it took.
+		"""
+		cache = self.owner.get_response_cache(method, url)
+		headers = kwargs.get('headers')
+		conditional_headers: dict = {}
+		if cache:
+			cached_response, conditional_headers = cache.lookup(url)
+			if cached_response is not None:
+				return self.__finish(cached_response), 0
+			if conditional_headers:
+				kwargs['headers'] = {**(headers or {}), **conditional_headers}
+
+		response, retries = self.__coalesce(method, url, *args, **kwargs)
+
+		if cache:
+			response = cache.update(url, response)
+			# the entry was evicted while the request was in flight, get the full response instead
+			if response.status_code == 304 and conditional_headers:
+				kwargs['headers'] = headers
+				response, more_retries = self.__coalesce(method, url, *args, **kwargs)
+				response, retries = cache.update(url, response), retries + more_retries
+		elif method != 'GET' and self.owner.response_cache and response.ok:
+			self.owner.response_cache.invalidate(url)
+		if method not in COALESCE_METHODS and response.ok:
+			# requests sent after a write must not share the response of one sent before it
+			_in_flight.forget(lambda key: is_related_url(key[1], url))
+		return self.__finish(response), retries
+
+	def __coalesce(self, method: str, url: str, *args, **kwargs) -> Tuple[Response, int]:
+		"""
+		Sends a request, sharing the response of an identical request in flight if the owner coalesces requests.
+		"""
+		if self.owner.coalesce_requests and method in COALESCE_METHODS:
+			return _in_flight.do(coalesce_key(method, url, kwargs), lambda: self.__send(method, url, *args, **kwargs))
+		return self.__send(method, url, *args, **kwargs)
+
+	def __finish(self, response: Response) -> Response:
+		"""
+		Applies the owner's response settings.
+		"""
+		return install_decoder(response) if self.owner.fast_json else response
+
+	def __send(self, method: str, url: str, *args, **kwargs) -> Tuple[Response, int]:
+		"""
+		Sends a request, retrying it as long as the retry policy allows.
+		Returns the response and the number of retries it took.
+		"""
+		policy = self.owner.get_retry_policy(method, url)
+		# bodies which can't be rewound are sent only once
+		streams = body_streams(kwargs)
+		attempt = 0
+		while True:
+			if limiter := get_rate_limiter(url):
+				limiter.acquire()
+			try:
+				response = super().request(method, url, *args, **kwargs)
+			except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+				if streams is None or not policy.should_retry(method, attempt):
+					raise
+				delay = policy.get_delay(attempt)
+				base_logger.info('%s %s failed (%s) -> retry %d in %.2fs', method, url, e, attempt+1, delay)
+			else:
+				if streams is None or not policy.should_retry(method, attempt, response.status_code):
+					return response, attempt
+				delay = policy.get_delay(attempt, response.headers)
+				base_logger.info('%s %s returned %d -> retry %d in %.2fs', method, url, response.status_code, attempt+1, delay)
+				response.close()
+			time.sleep(delay)
+			for stream, position in streams:
+				stream.seek(position)
+			attempt += 1
 
 class Base(ABC):
 	"""
@@ -29,6 +196,24 @@ class Base(ABC):
 	# generally accepted success responses
 	success_responses = [200,201,202,203,204]
 
+	# default retry policy for all API calls
+	retry_policy = RetryPolicy()
+
+	# retry policies for specific endpoints, keys are regular expressions matched against "METHOD URL"
+	endpoint_retry_policies: Dict[str, RetryPolicy] = {}
+
+	# decode response bodies with the fastest available JSON backend (see Decoder.py)
+	fast_json = False
+
+	# merge identical concurrent GET requests into one API call, all callers get the same Response object
+	coalesce_requests = True
+
+	# optional cache for GET requests to cacheable endpoints (see ResponseCache.py)
+	response_cache: Optional[ResponseCache] = None
+
+	# endpoints whose GET responses may be cached, regular expressions matched against the URL
+	cacheable_endpoints: List[str] = []
+
 	def __init__(self, oauth: OAuth, query: str='') -> None:
 		"""
 		Args:
@@ -39,15 +224,67 @@ class Base(ABC):
 		self.__session = self._get_session()
 		self.__oauth = oauth
 
+	def _get_session(self) -> requests.Session:
+		"""
+		Returns a requests Session using the shared connection pools and the instances retry policies.
+		"""
+		return APISession(owner=self)
+
+	@classmethod
+	def set_rate_limit(cls, rate: float, burst: int=0) -> TokenBucket:
+		"""
+		Sets the rate limit for the API host of this class. The limit is shared by all instances
+		of all classes using the same host.
+
+		Args:
+			rate (float): Requests per second.
+			burst (int, optional): Maximum burst size. Defaults to 0 which means max(1, rate).
+
+		Returns:
+			TokenBucket: The rate limiter for the host.
+		"""
+		return set_rate_limit(cls.base_url, rate=rate, burst=burst) # type: ignore
+
+	def get_response_cache(self, method: str, url: str) -> Optional[ResponseCache]:
+		"""
+		Gets the response cache to use for an API call.
+
+		Args:
+			method (str): HTTP method of the API call.
+			url (str): URL of the API call.
+
+		Returns:
+			Optional[ResponseCache]: The instances response cache if the call is cacheable, None otherwise.
+		"""
+		if self.response_cache and method.upper() == 'GET':
+			for pattern in self.cacheable_endpoints:
+				if re.search(pattern, url):
+					return self.response_cache
+		return None
+
+	def get_retry_policy(self, method: str, url: str) -> RetryPolicy:
+		"""
+		Gets the retry policy for an API call.
+
+		Args:
+			method (str): HTTP method of the API call.
+			url (str): URL of the API call.
+
+		Returns:
+			RetryPolicy: First matching policy from endpoint_retry_policies, retry_policy otherwise.
+		"""
+		endpoint = f'{method.upper()} {url}'
+		for pattern, policy in self.endpoint_retry_policies.items():
+			if re.search(pattern, endpoint):
+				return policy
+		return self.retry_policy
+
 	@staticmethod
-	def _get_session() -> requests.Session:
+	def decode_json(response: Response) -> Any:
 		"""
-		Returns a requests Session with a connection pool of 100.
+		Returns the deserialized JSON body of a response using the fastest available JSON backend.
 		"""
-		sess = requests.Session()
-		adapter = requests.adapters.HTTPAdapter(pool_connections=100, pool_maxsize=100)
-		sess.mount('https://', adapter)
-		return sess
+		return decode_response(response)
 
 	@staticmethod
 	def _json_to_string(json_object:Union[str, dict]) -> Optional[str]:
@@ -267,6 +267,14 @@ class CMS(Base):
     # base URL for API calls
     base_url = 'https://cms.api.brightcove.com/v1/accounts/{account_id}'
 
+    # read-mostly endpoints which can use a response cache
+    # single videos are left out, most are only fetched once per run and would evict the useful entries
+    cacheable_endpoints = [
+        r'/video_fields(/custom_fields)?$',
+        r'/folders$',
+        r'/labels$',
+    ]
+
     def __init__(self, oauth: OAuth, query: str=''):
         """
         Args:
@@ -0,0 +1,191 @@
+"""
+Local copy of the video objects of accounts, stored in a SQLite database.
+
+The catalog is filled by syncCatalog.py and lets scripts which only read video
+objects enumerate them locally instead of paging through the CMS API. Videos are
+indexed by account and created_at (the order the API enumerates them in) and by
+updated_at, so resumed and delta runs work on the catalog as well.
+
+Every account remembers when it was last synced completely, which is used to
+decide if the catalog is fresh enough to be used instead of the API.
+
+Example:
+	catalog = VideoCatalog()
+	catalog.store(account_id, videos)
+	catalog.set_synced(account_id, sync_start)
+	...
+	if catalog.is_fresh(account_id, max_age=timedelta(hours=1)):
+		for video in catalog.videos(account_id):
+			...
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from os.path import expanduser
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional
+from .Decoder import loads
+from .Enumerator import parse_timestamp
+
+def sort_key(timestamp: str) -> str:
+	"""
+	Converts a CMS API timestamp into a UTC timestamp with microseconds, which sorts correctly as a string.
+	"""
+	return format_time(parse_timestamp(timestamp))
+
+def format_time(timestamp: datetime) -> str:
+	"""
+	Converts a datetime into a catalog timestamp.
+	"""
+	return timestamp.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+class VideoCatalog():
+	"""
+	Thread-safe local copy of the video objects of accounts.
+	"""
+
+	def __init__(self, filename: str='') -> None:
+		"""
+		Args:
+			filename (str, optional): Path and name of the database. Defaults to '' which
+				will use "brightcove_catalog.sqlite" in the user's home folder.
+		"""
+		self.filename = filename or expanduser('~')+'/brightcove_catalog.sqlite'
+		self.__lock = Lock()
+		# several processes (e.g. shards) may write to the same catalog
+		self.__db_conn = sqlite3.connect(self.filename, check_same_thread=False, timeout=60)
+		with self.__lock, self.__db_conn:
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS videos (account_id TEXT NOT NULL, id TEXT NOT NULL, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, '
+				'synced_at TEXT NOT NULL, video TEXT NOT NULL, PRIMARY KEY (account_id, id)) WITHOUT ROWID')
+			self.__db_conn.execute('CREATE INDEX IF NOT EXISTS videos_created_at ON videos (account_id, created_at, id)')
+			self.__db_conn.execute('CREATE INDEX IF NOT EXISTS videos_updated_at ON videos (account_id, updated_at)')
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS accounts (account_id TEXT PRIMARY KEY, synced_at TEXT NOT NULL)')
+
+	@staticmethod
+	def now() -> str:
+		"""
+		Returns the current time as a catalog timestamp.
+		"""
+		return format_time(datetime.now(timezone.utc))
+
+	def store(self, account_id: str, videos: Iterable[dict], synced_at: str='') -> None:
+		"""
+		Adds or replaces video objects.
+
+		Args:
+			account_id (str): Brightcove Account ID.
+			videos (Iterable[dict]): Video objects from the CMS API.
+			synced_at (str, optional): Time the videos were fetched. Defaults to '' which uses the current time.
+		"""
+		synced_at = synced_at or self.now()
+		rows = [ (account_id, str(video['id']), sort_key(video['created_at']), sort_key(video.get('updated_at') or video['created_at']),
+			synced_at, json.dumps(video)) for video in videos ]
+		with self.__lock, self.__db_conn:
+			self.__db_conn.executemany('INSERT OR REPLACE INTO videos (account_id, id, created_at, updated_at, synced_at, video) VALUES (?,?,?,?,?,?)', rows)
+
+	def delete(self, account_id: str, video_ids: Iterable[str]) -> None:
+		"""
+		Removes videos.
+		"""
+		with self.__lock, self.__db_conn:
+			self.__db_conn.executemany('DELETE FROM videos WHERE account_id=? AND id=?', ((account_id, str(video_id)) for video_id in video_ids))
+
+	def prune(self, account_id: str, synced_before: str) -> int:
+		"""
+		Removes the videos of an account which were not stored since a time, e.g. the start of a
+		complete sync, because they no longer exist.
+
+		Returns:
+			int: Number of videos removed.
+		"""
+		with self.__lock, self.__db_conn:
+			return self.__db_conn.execute('DELETE FROM videos WHERE account_id=? AND synced_at<?', (account_id, synced_before)).rowcount
+
+	def set_synced(self, account_id: str, synced_at: str) -> None:
+		"""
+		Records the time of the last complete sync of an account. Only videos changed after that time can be missing.
+		"""
+		with self.__lock, self.__db_conn:
+			self.__db_conn.execute('INSERT OR REPLACE INTO accounts (account_id, synced_at) VALUES (?,?)', (account_id, synced_at))
+
+	def synced_at(self, account_id: str) -> Optional[datetime]:
+		"""
+		Returns the time of the last complete sync of an account, None if it was never synced.
+		"""
+		with self.__lock:
+			row = self.__db_conn.execute('SELECT synced_at FROM accounts WHERE account_id=?', (account_id,)).fetchone()
+		return parse_timestamp(row[0]) if row else None
+
+	def is_fresh(self, account_id: str, max_age: timedelta) -> bool:
+		"""
+		Checks if an account was synced completely within max_age.
+		"""
+		synced_at = self.synced_at(account_id)
+		return synced_at is not None and datetime.now(timezone.utc) - synced_at <= max_age
+
+	@staticmethod
+	def _where(start: Optional[str], updated_since: Optional[str]) -> tuple:
+		"""
+		Returns the conditions and parameters for videos created at or after start and updated at or after updated_since.
+		"""
+		conditions, params = '', []
+		if start:
+			conditions += ' AND created_at>=?'
+			params.append(sort_key(start))
+		if updated_since:
+			conditions += ' AND updated_at>=?'
+			params.append(sort_key(updated_since))
+		return conditions, params
+
+	def count(self, account_id: str, start: Optional[str]=None, updated_since: Optional[str]=None) -> int:
+		"""
+		Returns the number of videos of an account, optionally only those created at or after start
+		and updated at or after updated_since.
+		"""
+		conditions, params = self._where(start, updated_since)
+		with self.__lock:
+			return self.__db_conn.execute(f'SELECT COUNT(*) FROM videos WHERE account_id=?{conditions}', [account_id] + params).fetchone()[0]
+
+	def videos(self, account_id: str, start: Optional[str]=None, updated_since: Optional[str]=None, limit: int=0, page_size: int=1000) -> Iterator[dict]:
+		"""
+		Yields the videos of an account in created_at order, like the CMS API enumerates them.
+
+		Args:
+			account_id (str): Brightcove Account ID.
+			start (Optional[str], optional): Only videos created at or after this time. Defaults to None.
+			updated_since (Optional[str], optional): Only videos updated at or after this time. Defaults to None.
+			limit (int, optional): Maximum number of videos, 0 for all. Defaults to 0.
+			page_size (int, optional): Number of videos read from the database at a time. Defaults to 1000.
+
+		Yields:
+			dict: Video objects.
+		"""
+		conditions, params = self._where(start, updated_since)
+		last: Optional[tuple] = None
+		num_videos = 0
+		while True:
+			# keyset paging, so no cursor is kept open while the videos are processed
+			page_conditions, page_params = conditions, list(params)
+			if last:
+				page_conditions += ' AND (created_at>? OR (created_at=? AND id>?))'
+				page_params += [last[0], last[0], last[1]]
+			with self.__lock:
+				rows: List[tuple] = self.__db_conn.execute(f'SELECT created_at, id, video FROM videos WHERE account_id=?{page_conditions} '
+					'ORDER BY created_at, id LIMIT ?', [account_id] + page_params + [page_size]).fetchall()
+			for row in rows:
+				yield loads(row[2])
+				num_videos += 1
+				if limit and num_videos >= limit:
+					return
+			if len(rows) < page_size:
+				return
+			last = rows[-1][:2]
+
+	def get(self, account_id: str, video_id: str) -> Optional[dict]:
+		"""
+		Returns a video object, None if it's not in the catalog.
+		"""
+		with self.__lock:
+			row = self.__db_conn.execute('SELECT video FROM videos WHERE account_id=? AND id=?', (account_id, str(video_id))).fetchone()
+		return loads(row[0]) if row else None
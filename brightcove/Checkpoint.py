@@ -0,0 +1,161 @@
+"""
+Checkpoints for long running jobs, stored in a SQLite database.
+
+A checkpoint tracks the items (videos) of a run in the order they were handed out.
+Only two things are stored: the position of the last item up to which every item
+has been processed (e.g. its created_at or its index in a list) and the IDs of the
+items after that position which have already been processed out of order. Both
+stay small no matter how many items a run has. Items which failed don't hold the
+position back, their IDs are kept separately so a resumed run can retry them.
+
+Example:
+	checkpoint = Checkpoint(run='report.py|123456789001')
+	retry(checkpoint.failed_ids)
+	for video in enumerate_from(checkpoint.position):
+		if video['id'] not in checkpoint.processed_ids:
+			checkpoint.add(video['id'], video['created_at'])
+			...
+	# in the workers
+	checkpoint.done(video_id, failed=not success)
+	# at the end
+	checkpoint.finish()
+
+The same database also keeps high-water marks, e.g. the time of the last run of a
+job which only needs to process videos changed since then.
+"""
+
+import time
+import sqlite3
+from collections import OrderedDict
+from os.path import expanduser
+from threading import Lock
+from typing import List, Optional, Set
+
+class Checkpoint():
+	"""
+	Thread-safe checkpoint of a single run.
+	"""
+
+	def __init__(self, run: str, filename: str='', resume: bool=True, flush_interval: float=5.0) -> None:
+		"""
+		Args:
+			run (str): Key identifying the run, e.g. the script name and account ID.
+			filename (str, optional): Path and name of the database. Defaults to '' which
+				will use "brightcove_checkpoint.sqlite" in the user's home folder.
+			resume (bool, optional): Continue from the stored state, start over if False. Defaults to True.
+			flush_interval (float, optional): Minimum number of seconds between writes to the database. Defaults to 5.
+		"""
+		self.run = run
+		self.filename = filename or expanduser('~')+'/brightcove_checkpoint.sqlite'
+		self.flush_interval = flush_interval
+		self.position: Optional[str] = None
+		self.finished = False
+		self.processed_ids: Set[str] = set()
+		self.failed_ids: Set[str] = set()
+		self.__lock = Lock()
+		self.__items: 'OrderedDict[str, List]' = OrderedDict()
+		self.__at_position: Set[str] = set()
+		self.__last_flush = time.time()
+		self.__db_conn = sqlite3.connect(self.filename, check_same_thread=False, timeout=60)
+		with self.__lock, self.__db_conn:
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS runs (run TEXT PRIMARY KEY, position TEXT, finished INTEGER NOT NULL, updated_at REAL NOT NULL)')
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS processed (run TEXT NOT NULL, item_id TEXT NOT NULL, PRIMARY KEY (run, item_id)) WITHOUT ROWID')
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS failed (run TEXT NOT NULL, item_id TEXT NOT NULL, PRIMARY KEY (run, item_id)) WITHOUT ROWID')
+			if resume:
+				if row := self.__db_conn.execute('SELECT position, finished FROM runs WHERE run=?', (run,)).fetchone():
+					self.position, self.finished = row[0], bool(row[1])
+				self.processed_ids = { row[0] for row in self.__db_conn.execute('SELECT item_id FROM processed WHERE run=?', (run,)) }
+				self.failed_ids = { row[0] for row in self.__db_conn.execute('SELECT item_id FROM failed WHERE run=?', (run,)) }
+			else:
+				self.__db_conn.execute('DELETE FROM runs WHERE run=?', (run,))
+				self.__db_conn.execute('DELETE FROM processed WHERE run=?', (run,))
+				self.__db_conn.execute('DELETE FROM failed WHERE run=?', (run,))
+
+	def add(self, item_id: str, position: str) -> None:
+		"""
+		Adds an item which is handed out for processing. Items must be added in order.
+
+		Args:
+			item_id (str): ID of the item.
+			position (str): Position of the item, used to resume after it.
+		"""
+		with self.__lock:
+			self.__items.setdefault(item_id, [position, False])
+
+	def done(self, item_id: str, failed: bool=False) -> None:
+		"""
+		Marks an item as processed.
+
+		Args:
+			item_id (str): ID of the item.
+			failed (bool, optional): The item could not be processed and is retried by a resumed run. Defaults to False.
+		"""
+		with self.__lock:
+			if failed:
+				self.failed_ids.add(item_id)
+			else:
+				self.failed_ids.discard(item_id)
+			if item := self.__items.get(item_id):
+				item[1] = True
+			# advance the position over all items processed in order
+			while self.__items and (first := next(iter(self.__items.values())))[1]:
+				first_id, _ = self.__items.popitem(last=False)
+				if first[0] != self.position:
+					self.position = first[0]
+					self.__at_position.clear()
+				self.__at_position.add(first_id)
+			flush = time.time() - self.__last_flush > self.flush_interval
+		if flush:
+			self.flush()
+
+	def flush(self) -> None:
+		"""
+		Writes the checkpoint to the database.
+		"""
+		with self.__lock, self.__db_conn:
+			self.__last_flush = time.time()
+			processed = self.processed_ids | self.__at_position | { item_id for item_id, item in self.__items.items() if item[1] }
+			self.__db_conn.execute('INSERT OR REPLACE INTO runs (run, position, finished, updated_at) VALUES (?,?,?,?)', (self.run, self.position, self.finished, self.__last_flush))
+			self.__db_conn.execute('DELETE FROM processed WHERE run=?', (self.run,))
+			self.__db_conn.executemany('INSERT INTO processed (run, item_id) VALUES (?,?)', ((self.run, item_id) for item_id in processed))
+			self.__db_conn.execute('DELETE FROM failed WHERE run=?', (self.run,))
+			self.__db_conn.executemany('INSERT INTO failed (run, item_id) VALUES (?,?)', ((self.run, item_id) for item_id in self.failed_ids))
+
+	def finish(self) -> None:
+		"""
+		Marks the run as finished, a resumed run has nothing left to do except retrying the failed items.
+		"""
+		with self.__lock:
+			self.finished = not self.failed_ids
+			if self.finished:
+				self.processed_ids.clear()
+				self.__at_position.clear()
+				self.__items.clear()
+		self.flush()
+
+class HighWaterMark():
+	"""
+	A value which is kept between runs, e.g. the time a job last ran successfully.
+	"""
+
+	def __init__(self, run: str, filename: str='') -> None:
+		"""
+		Args:
+			run (str): Key identifying the job, e.g. the script name and account ID.
+			filename (str, optional): Path and name of the database. Defaults to '' which
+				will use "brightcove_checkpoint.sqlite" in the user's home folder.
+		"""
+		self.run = run
+		self.filename = filename or expanduser('~')+'/brightcove_checkpoint.sqlite'
+		with sqlite3.connect(self.filename, timeout=60) as db_conn:
+			db_conn.execute('CREATE TABLE IF NOT EXISTS marks (run TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)')
+			row = db_conn.execute('SELECT value FROM marks WHERE run=?', (run,)).fetchone()
+		self.value: Optional[str] = row[0] if row else None
+
+	def set(self, value: str) -> None:
+		"""
+		Stores a new value.
+		"""
+		with sqlite3.connect(self.filename, timeout=60) as db_conn:
+			db_conn.execute('INSERT OR REPLACE INTO marks (run, value, updated_at) VALUES (?,?,?)', (self.run, value, time.time()))
+		self.value = value
@@ -0,0 +1,175 @@
+"""
+Adaptive concurrency limit for worker threads.
+
+The limit is adjusted at runtime with additive increase, multiplicative decrease
+(AIMD), like TCP congestion control. Every interval the API calls of the last
+interval are judged: throttled (429) or retried calls, a high error rate or a
+latency far above the best latency seen so far for the same endpoints halve the limit; otherwise the
+limit grows by one if all allowed workers were busy. Until the first decrease
+the limit doubles instead (slow start), so a good limit is found quickly.
+
+The limiter learns about API calls as a request hook (see Instrumentation.py).
+Request hooks see the API calls of the whole process, so a limiter can be
+restricted to the calls for one account when several are processed at once.
+
+Example:
+	limiter = AIMDLimiter(min_limit=2, max_limit=50)
+	add_request_hook(limiter)
+	# in every worker thread
+	with limiter:
+		...
+	remove_request_hook(limiter)
+"""
+
+import time
+import logging
+from threading import Condition
+from typing import Dict, List, Tuple
+from .Instrumentation import RequestEvent
+
+aimd_logger = logging.getLogger(__name__)
+
+class AIMDLimiter():
+	"""
+	Thread-safe concurrency limit with additive increase and multiplicative decrease.
+	"""
+
+	def __init__(self, min_limit: int=1, max_limit: int=10, interval: float=1.0, backoff: float=0.5,
+		latency_factor: float=2.0, max_error_rate: float=0.05, account_id: str='') -> None:
+		"""
+		Args:
+			min_limit (int, optional): Lowest limit. Defaults to 1.
+			max_limit (int, optional): Highest limit. Defaults to 10.
+			interval (float, optional): Number of seconds between adjustments. Defaults to 1.
+			backoff (float, optional): Factor applied to the limit on a decrease. Defaults to 0.5.
+			latency_factor (float, optional): Decrease if the mean latency of the endpoints called in an interval
+				is this many times their lowest mean latency seen. Defaults to 2.
+			max_error_rate (float, optional): Decrease if more API calls failed. Defaults to 0.05.
+			account_id (str, optional): Only follow the API calls for this account, all calls if empty. Defaults to ''.
+		"""
+		self.min_limit = max(1, min_limit)
+		self.max_limit = max(self.min_limit, max_limit)
+		self.interval = interval
+		self.backoff = backoff
+		self.latency_factor = latency_factor
+		self.max_error_rate = max_error_rate
+		self.account_id = account_id
+		self.limit = self.min_limit
+		self.__cond = Condition()
+		self.__active = 0
+		self.__slow_start = True
+		self.__saturated = False
+		self.__baselines: Dict[Tuple[str, str], float] = {}
+		self.__started_at = self.__window_start = time.monotonic()
+		self.__limit_time = 0.0
+		self.__reset_window()
+
+	def __reset_window(self) -> None:
+		"""
+		Starts a new interval.
+		"""
+		self.__calls = 0
+		self.__errors = 0
+		self.__throttled = 0
+		self.__latencies: Dict[Tuple[str, str], List[float]] = {}
+		self.__saturated = self.__active >= self.limit
+
+	def __adjust(self) -> None:
+		"""
+		Adjusts the limit if the interval is over. Must be called with the lock held.
+		"""
+		now = time.monotonic()
+		if now - self.__window_start < self.interval:
+			return
+		self.__limit_time += self.limit * (now - self.__window_start)
+		self.__window_start = now
+
+		reason = ''
+		if self.__calls:
+			# mean latency of each endpoint relative to the best mean seen for it
+			ratio = 0.0
+			for key, (total, calls) in self.__latencies.items():
+				mean_latency = total / calls
+				self.__baselines[key] = min(self.__baselines.get(key, mean_latency), mean_latency)
+				ratio += mean_latency / max(self.__baselines[key], 1e-6) * calls
+			ratio /= self.__calls
+			if self.__throttled:
+				reason = f'{self.__throttled} throttled/retried calls'
+			elif self.__errors / self.__calls > self.max_error_rate:
+				reason = f'{self.__errors} of {self.__calls} calls failed'
+			elif ratio > self.latency_factor:
+				reason = f'latency {ratio:.1f} times the best'
+
+		if reason:
+			self.__slow_start = False
+			limit = max(self.min_limit, int(self.limit * self.backoff))
+		elif self.__saturated:
+			limit = min(self.max_limit, self.limit * 2 if self.__slow_start else self.limit + 1)
+		else:
+			limit = self.limit
+
+		if limit != self.limit:
+			aimd_logger.info('Concurrency %d -> %d%s', self.limit, limit, f' ({reason})' if reason else '')
+			self.limit = limit
+			self.__cond.notify_all()
+		self.__reset_window()
+
+	def acquire(self) -> None:
+		"""
+		Waits until fewer than limit workers are active and marks one more as active.
+		"""
+		with self.__cond:
+			self.__adjust()
+			while self.__active >= self.limit:
+				self.__cond.wait(timeout=self.interval)
+				self.__adjust()
+			self.__active += 1
+			if self.__active >= self.limit:
+				self.__saturated = True
+
+	def release(self) -> None:
+		"""
+		Marks an active worker as done.
+		"""
+		with self.__cond:
+			self.__active -= 1
+			self.__adjust()
+			self.__cond.notify()
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, exc_type, exc_value, exc_traceback):
+		self.release()
+
+	def __call__(self, event: RequestEvent) -> None:
+		"""
+		Request hook, records an API call.
+		"""
+		if self.account_id and event.account_id != self.account_id:
+			return
+		with self.__cond:
+			self.__calls += 1
+			latency = self.__latencies.setdefault((event.method, event.endpoint), [0.0, 0])
+			latency[0] += event.latency
+			latency[1] += 1
+			if event.status == 429 or event.retries:
+				self.__throttled += 1
+			elif event.status < 0 or event.status >= 500:
+				self.__errors += 1
+
+	def average(self) -> float:
+		"""
+		Returns the time weighted average limit since the limiter was created.
+		"""
+		with self.__cond:
+			now = time.monotonic()
+			total = self.__limit_time + self.limit * (now - self.__window_start)
+			return total / max(now - self.__started_at, 1e-9)
+
+	def summary(self) -> str:
+		"""
+		Returns a line describing the limit the limiter settled on.
+		"""
+		return f'Adaptive concurrency: settled at {self.limit} workers, {self.average():.1f} on average (limits {self.min_limit} to {self.max_limit}).'
@@ -0,0 +1,96 @@
+"""
+Process-wide registry of HTTP connection pools, one per host.
+
+All sessions created by the API wrappers, OAuth and mackee.py use the pools from
+this registry, so TCP and TLS connections to a host are set up once per process
+and reused by every wrapper instance. The asynchronous wrappers share one aiohttp
+connection pool per event loop, sized with the same settings.
+
+Example:
+	configure_connection_pools(pool_maxsize=workers+10)
+"""
+
+import socket
+from threading import Lock
+from typing import Dict, List, Tuple, cast
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+# TCP keep-alive so idle pooled connections are not silently dropped by NAT/load balancers
+KEEPALIVE_SOCKET_OPTIONS: List[Tuple[int, int, int]] = HTTPConnection.default_socket_options + [
+	(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+class PooledAdapter(HTTPAdapter):
+	"""
+	HTTPAdapter with TCP keep-alive enabled on all pooled connections.
+	"""
+
+	def init_poolmanager(self, *args, **kwargs):
+		kwargs.setdefault('socket_options', KEEPALIVE_SOCKET_OPTIONS)
+		super().init_poolmanager(*args, **kwargs)
+
+class PooledSession(requests.Session):
+	"""
+	requests Session which uses the shared connection pool registry for all hosts.
+	"""
+
+	def get_adapter(self, url: str) -> HTTPAdapter:
+		"""
+		Returns the shared adapter for the host of url.
+		"""
+		if url.lower().startswith(('https://', 'http://')):
+			return get_adapter(url)
+		return cast(HTTPAdapter, super().get_adapter(url))
+
+# registry of all connection pools in this process
+_adapters: Dict[str, HTTPAdapter] = {}
+_adapters_lock = Lock()
+_pool_settings = { 'pool_maxsize': 100, 'pool_block': False }
+
+def configure_connection_pools(pool_maxsize: int=100, pool_block: bool=False) -> None:
+	"""
+	Sets the size of the connection pools. Pools which already exist are closed and
+	replaced with new ones when they are requested the next time.
+
+	Args:
+		pool_maxsize (int, optional): Maximum number of connections kept per host. Should be
+			at least the number of threads making requests. Defaults to 100.
+		pool_block (bool, optional): Block if all connections of a host are in use instead of
+			opening a connection which is discarded after use. Defaults to False.
+	"""
+	with _adapters_lock:
+		_pool_settings.update(pool_maxsize=pool_maxsize, pool_block=pool_block)
+		adapters = list(_adapters.values())
+		_adapters.clear()
+	for adapter in adapters:
+		adapter.close()
+
+def get_pool_maxsize() -> int:
+	"""
+	Returns the maximum number of connections kept per host.
+	"""
+	return int(_pool_settings['pool_maxsize'])
+
+def get_adapter(url: str) -> HTTPAdapter:
+	"""
+	Gets the shared adapter (connection pool) for the host of a URL. Creates one if it doesn't exist yet.
+
+	Args:
+		url (str): Any URL on the host.
+
+	Returns:
+		HTTPAdapter: The adapter for the host.
+	"""
+	parts = urlsplit(url)
+	key = f'{parts.scheme}://{parts.netloc}'.lower()
+	adapter = _adapters.get(key)
+	if adapter is None:
+		with _adapters_lock:
+			adapter = _adapters.get(key)
+			if adapter is None:
+				adapter = PooledAdapter(pool_connections=1, **_pool_settings) # type: ignore
+				_adapters[key] = adapter
+	return adapter
@@ -0,0 +1,72 @@
+"""
+JSON decoding using the fastest available backend.
+
+Uses orjson or ujson if one of them is installed and falls back to the json module
+from the standard library otherwise. The faster backends also release the GIL for
+a much shorter time, which lets worker threads overlap better.
+
+Optional: pip3 install orjson
+"""
+
+import json
+from typing import Any, Callable, Union
+from requests.models import Response
+
+try:
+	import orjson # pip3 install orjson
+	_loads: Callable[[Union[bytes, str]], Any] = orjson.loads
+	BACKEND = 'orjson'
+except ImportError:
+	try:
+		import ujson # type: ignore # pip3 install ujson
+		_loads = ujson.loads
+		BACKEND = 'ujson'
+	except ImportError:
+		_loads = json.loads
+		BACKEND = 'json'
+
+def loads(data: Union[bytes, str]) -> Any:
+	"""
+	Deserializes a JSON document.
+
+	Args:
+		data (Union[bytes, str]): UTF-8 encoded JSON document.
+
+	Returns:
+		Any: The deserialized object.
+
+	Raises:
+		ValueError: If data is not valid JSON.
+	"""
+	return _loads(data)
+
+def decode_response(response: Response) -> Any:
+	"""
+	Deserializes the JSON body of a response. Falls back to the standard library
+	decoder (and its encoding detection) if the fast backend fails.
+
+	Args:
+		response (Response): requests Response object.
+
+	Returns:
+		Any: The deserialized body.
+	"""
+	if BACKEND != 'json':
+		try:
+			return _loads(response.content)
+		except ValueError:
+			pass
+	return Response.json(response)
+
+def install_decoder(response: Response) -> Response:
+	"""
+	Replaces the json() method of a response with decode_response.
+
+	Args:
+		response (Response): requests Response object.
+
+	Returns:
+		Response: The same response object.
+	"""
+	response.json = lambda **kwargs: Response.json(response, **kwargs) if kwargs else decode_response(response) # type: ignore
+	return response
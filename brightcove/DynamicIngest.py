@@ -10,6 +10,7 @@ from requests.models import Response
 import boto3
 from .Base import Base
 from .OAuth import OAuth
+from .Retry import RetryPolicy, ALL_METHODS
 from .IngestProfiles import IngestProfiles
 from .CMS import CMS
 from .utils import empty_function
@@ -48,6 +49,11 @@ class DynamicIngest(Base):
     # base URL for all API calls
     base_url = 'https://ingest.api.brightcove.com/v1/accounts/{account_id}'
 
+    # a 429 on ingest requests means the job queue is full and the job was not accepted, so it's safe to resubmit
+    endpoint_retry_policies = {
+        r'^POST .*/ingest-requests$': RetryPolicy(max_retries=10, backoff_factor=2.0, retry_on_status=frozenset({429}), retry_methods=ALL_METHODS),
+    }
+
     def __init__(self, oauth: OAuth, ingest_profile: str='', priority_queue: str='normal') -> None:
         """
         Args:
@@ -191,17 +197,32 @@ class DynamicIngest(Base):
         url = f'{CMS.base_url}/videos/{video_id}/upload-urls/{file_name}'.format(account_id=account_id or self.oauth.account_id)
         response = self.session.get(url=url, headers=self.oauth.headers)
         if response.status_code in DynamicIngest.success_responses:
-            upload_urls_response = response.json()
-            try:
-                s3 = boto3.resource('s3',
-                    aws_access_key_id=upload_urls_response.get('access_key_id'),
-                    aws_secret_access_key=upload_urls_response.get('secret_access_key'),
-                    aws_session_token=upload_urls_response.get('session_token'))
-
-                callback = callback or empty_function
-
-                s3.Object(upload_urls_response.get('bucket'), upload_urls_response.get('object_key')).upload_file(file_name, Callback=callback)
-                return upload_urls_response
-            except Exception as e:
-                print (e)
+            return self._upload_to_s3(upload_urls_response=response.json(), file_name=file_name, callback=callback)
+        return {}
+
+    @staticmethod
+    def _upload_to_s3(upload_urls_response: dict, file_name: str, callback: Optional[Callable]=None) -> dict:
+        """
+        Performs the multipart upload of a local file to the S3 bucket returned by the CMS API upload-urls endpoint.
+
+        Args:
+            upload_urls_response (dict): Deserialized response of the upload-urls endpoint.
+            file_name (str): Path and name of file to upload.
+            callback (Optional[Callable], optional): Callback function for progress reporting. Defaults to None.
+
+        Returns:
+            dict: The upload_urls_response if the upload succeeded. Empty in case of an error.
+        """
+        try:
+            s3 = boto3.resource('s3',
+                aws_access_key_id=upload_urls_response.get('access_key_id'),
+                aws_secret_access_key=upload_urls_response.get('secret_access_key'),
+                aws_session_token=upload_urls_response.get('session_token'))
+
+            callback = callback or empty_function
+
+            s3.Object(upload_urls_response.get('bucket'), upload_urls_response.get('object_key')).upload_file(file_name, Callback=callback)
+            return upload_urls_response
+        except Exception as e:
+            print (e)
         return {}
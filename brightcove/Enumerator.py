@@ -0,0 +1,375 @@
+"""
+Enumeration of all videos in an account by created_at windows.
+
+Paging through a whole library with limit/offset gets slower the deeper the offset
+and is capped by the CMS API. The enumerator instead splits the library into
+created_at windows which are small enough for cheap offset paging. Window sizes are
+found with count queries (a window with too many videos is split in half until it
+fits) and the windows are walked in parallel. Videos are still returned in
+created_at order and every video only once.
+
+After a window has been walked the number of videos received is compared with its
+count, windows which came up short are recorded as gaps.
+
+A scan can be split into shards, e.g. to run it on several machines. Every created_at
+hour belongs to one shard (round robin), so which shard a video belongs to only depends
+on the video itself and every shard works it out on its own. Windows without any hour
+of the shard are not walked at all.
+
+Example:
+	enumerator = VideoEnumerator(cms, max_workers=4)
+	for video in enumerator.videos():
+		...
+	for gap in enumerator.gaps:
+		...
+"""
+
+import time
+import zlib
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
+from requests.exceptions import RequestException
+from .CMS import CMS
+
+enum_logger = logging.getLogger(__name__)
+
+# windows shorter than this are not split any further
+MIN_WINDOW_DURATION = timedelta(seconds=2)
+
+# created_at ranges which are assigned to shards round robin
+SHARD_CELL_DURATION = timedelta(hours=1)
+
+def parse_timestamp(timestamp: str) -> datetime:
+	"""
+	Converts a CMS API timestamp (e.g. "2019-05-14T20:36:53.345Z") into an aware datetime.
+	"""
+	return datetime.strptime(timestamp.replace('Z', '+0000'), '%Y-%m-%dT%H:%M:%S.%f%z' if '.' in timestamp else '%Y-%m-%dT%H:%M:%S%z')
+
+def format_timestamp(timestamp: datetime) -> str:
+	"""
+	Converts a datetime into a CMS API search timestamp with second precision.
+	"""
+	return timestamp.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+@dataclass
+class Window:
+	"""
+	A created_at range of videos, start is inclusive and end exclusive. An end of None is open.
+	"""
+	start: datetime
+	end: Optional[datetime]
+	count: int = -1
+
+	def search_clause(self) -> str:
+		"""
+		Returns the URL encoded search clause for the window.
+
+		Search ranges are inclusive and the API ignores fractions of seconds, so the clause
+		covers whole seconds and videos outside the window are filtered by contains().
+		"""
+		start = format_timestamp(self.start.replace(microsecond=0))
+		end = ''
+		if self.end is not None:
+			end = format_timestamp(self.end.replace(microsecond=0) + timedelta(seconds=1 if self.end.microsecond else 0))
+		return quote(f'+created_at:{start}..{end}', safe='')
+
+	def contains(self, video: dict) -> bool:
+		"""
+		Checks if a video was created within the window.
+		"""
+		created_at = parse_timestamp(video['created_at'])
+		return self.start <= created_at and (self.end is None or created_at < self.end)
+
+	def duration(self) -> timedelta:
+		"""
+		Returns the duration of the window, up to now if it is open.
+		"""
+		return (self.end or datetime.now(timezone.utc)) - self.start
+
+	def split(self) -> Tuple['Window', 'Window']:
+		"""
+		Splits the window into two halves.
+		"""
+		middle = self.start + self.duration() / 2
+		return Window(self.start, middle), Window(middle, self.end)
+
+	def __str__(self) -> str:
+		return f'{format_timestamp(self.start)}..{format_timestamp(self.end) if self.end else ""}'
+
+@dataclass
+class Gap:
+	"""
+	A window which returned fewer videos than its count, expected is -1 if it could not be counted.
+	"""
+	window: Window
+	expected: int
+	received: int
+
+@dataclass(frozen=True)
+class Shard:
+	"""
+	One of count parts of a scan, index is zero based. Videos are assigned by their created_at
+	hour, lists of video IDs by a hash of the ID.
+	"""
+	index: int
+	count: int
+
+	@classmethod
+	def parse(cls, value: str) -> 'Shard':
+		"""
+		Creates a shard from "i/N" with i from 1 to N.
+
+		Raises:
+			ValueError: if value is not a valid shard.
+		"""
+		number, _, count = value.partition('/')
+		if not (number.isdigit() and count.isdigit() and 1 <= int(number) <= int(count)):
+			raise ValueError(f'invalid shard "{value}", expected i/N with i from 1 to N')
+		return cls(int(number)-1, int(count))
+
+	@staticmethod
+	def _cell(timestamp: datetime) -> int:
+		return int(timestamp.timestamp() // SHARD_CELL_DURATION.total_seconds())
+
+	def owns(self, video: dict) -> bool:
+		"""
+		Checks if a video belongs to the shard.
+		"""
+		return self._cell(parse_timestamp(video['created_at'])) % self.count == self.index
+
+	def owns_id(self, video_id: str) -> bool:
+		"""
+		Checks if a video ID from a list belongs to the shard.
+		"""
+		return zlib.crc32(str(video_id).encode('utf-8')) % self.count == self.index
+
+	def overlaps(self, window: Window) -> bool:
+		"""
+		Checks if a window contains any created_at hour of the shard.
+		"""
+		if window.end is None or window.duration() >= SHARD_CELL_DURATION * self.count:
+			return True
+		first, last = self._cell(window.start), self._cell(window.end - timedelta(microseconds=1))
+		return any(cell % self.count == self.index for cell in range(first, last+1))
+
+	def __str__(self) -> str:
+		return f'{self.index+1}/{self.count}'
+
+class VideoEnumerator():
+	"""
+	Enumerates all videos of an account (or a search) by created_at windows.
+	"""
+
+	def __init__(self, cms: CMS, account_id: str='', search_query: Optional[str]=None, window_size: int=1000,
+		page_size: int=100, max_workers: int=4, max_retries: int=10, start: Optional[datetime]=None, light: bool=False,
+		shard: Optional[Shard]=None) -> None:
+		"""
+		Args:
+			cms (CMS): CMS instance to use.
+			account_id (str, optional): Brightcove Account ID. Defaults to '' which uses the account of the CMS instance.
+			search_query (Optional[str], optional): Search query. Defaults to None which uses the query of the CMS instance.
+			window_size (int, optional): Maximum number of videos per window. Defaults to 1000.
+			page_size (int, optional): Number of videos per page. Defaults to 100.
+			max_workers (int, optional): Number of windows counted and walked at the same time. Defaults to 4.
+			max_retries (int, optional): Number of retries for failed pages and counts. Defaults to 10.
+			start (Optional[datetime], optional): Only enumerate videos created at or after start. Defaults to None.
+			light (bool, optional): Get video objects with fewer fields from the lightvideos endpoint. Defaults to False.
+			shard (Optional[Shard], optional): Only enumerate the videos of a shard. Defaults to None.
+		"""
+		self.cms = cms
+		self.account_id = account_id or cms.oauth.account_id
+		self.search_query = cms.search_query if search_query is None else search_query
+		self.window_size = window_size
+		self.page_size = page_size
+		self.max_workers = max(1, max_workers)
+		self.max_retries = max_retries
+		self.gaps: List[Gap] = []
+		self.scan_end: Optional[datetime] = None
+		self.start = start
+		self.light = light
+		self.shard = shard
+
+	def _query(self, window: Window) -> str:
+		"""
+		Returns the search query for a window.
+		"""
+		return ' '.join(filter(None, [self.search_query, window.search_clause()]))
+
+	def _retry(self, attempt: int, what: str) -> bool:
+		"""
+		Waits before the next attempt. Returns False if there are no attempts left.
+		"""
+		if attempt >= self.max_retries:
+			enum_logger.warning('Giving up on %s after %d retries', what, attempt)
+			return False
+		delay = self.cms.retry_policy.get_delay(attempt=attempt)
+		enum_logger.info('Error getting %s -> retry %d in %.2fs', what, attempt+1, delay)
+		time.sleep(delay)
+		return True
+
+	def _count(self, window: Window) -> Window:
+		"""
+		Sets the count of a window, -1 if it could not be determined.
+		"""
+		attempt = 0
+		while True:
+			try:
+				window.count = self.cms.GetVideoCount(search_query=self._query(window), account_id=self.account_id)
+			except RequestException:
+				window.count = -1
+			if window.count >= 0 or not self._retry(attempt, f'count of window {window}'):
+				return window
+			attempt += 1
+
+	def _page(self, window: Optional[Window], page_size: int, page_offset: int) -> Optional[list]:
+		"""
+		Gets a page of videos in a window, None if it failed.
+		"""
+		search_query = self._query(window) if window else self.search_query
+		get_videos = self.cms.GetLightVideos if self.light else self.cms.GetVideos
+		attempt = 0
+		while True:
+			try:
+				response = get_videos(page_size=page_size, page_offset=page_offset, search_query=search_query, account_id=self.account_id)
+				if response.status_code in CMS.success_responses:
+					return response.json()
+			except (RequestException, ValueError):
+				pass
+			if not self._retry(attempt, f'page at offset {page_offset} of window {window}'):
+				return None
+			attempt += 1
+
+	def windows(self) -> List[Window]:
+		"""
+		Partitions the account into windows of at most window_size videos, unless a window
+		is too short to be split any further.
+
+		Returns:
+			List[Window]: Non-empty windows in created_at order.
+
+		Raises:
+			RequestException: If the oldest video or a window count could not be retrieved.
+		"""
+		start = self.start
+		if start is None:
+			oldest = self._page(None, page_size=1, page_offset=0)
+			if oldest is None:
+				raise RequestException(f'could not get the oldest video of account ID {self.account_id}')
+			if not oldest:
+				return []
+			start = parse_timestamp(oldest[0]['created_at'])
+
+		self.scan_end = datetime.now(timezone.utc)
+		todo = [Window(start, self.scan_end)]
+		windows: List[Window] = []
+		with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='window_counter') as executor:
+			while todo:
+				counted, todo = list(executor.map(self._count, todo)), []
+				for window in counted:
+					if window.count < 0:
+						raise RequestException(f'could not count the videos of window {window}')
+					if window.count == 0:
+						continue
+					if window.count > self.window_size and window.duration() > MIN_WINDOW_DURATION:
+						todo.extend(window.split())
+					else:
+						windows.append(window)
+
+		enum_logger.info('Partitioned account %s into %d windows', self.account_id, len(windows))
+		return sorted(windows, key=lambda window: window.start)
+
+	def walk(self, window: Window) -> Optional[List[dict]]:
+		"""
+		Gets all videos in a window, each only once, None if a page failed. Records a gap if
+		the window returned fewer videos than its count.
+
+		Args:
+			window (Window): The window.
+
+		Returns:
+			Optional[List[dict]]: The videos in created_at order.
+		"""
+		videos: List[dict] = []
+		# pages can overlap if videos are added while the window is walked
+		video_ids = set()
+		received = 0
+		while True:
+			page = self._page(window, page_size=self.page_size, page_offset=received)
+			if page is None:
+				self.gaps.append(Gap(window, window.count, received))
+				return None
+			received += len(page)
+			for video in page:
+				if window.contains(video) and video.get('id') not in video_ids:
+					video_ids.add(video.get('id'))
+					videos.append(video)
+			if len(page) < self.page_size:
+				break
+
+		if received < window.count:
+			self.gaps.append(Gap(window, window.count, received))
+		return videos
+
+	def videos(self, windows: Optional[List[Window]]=None, limit: int=0) -> Iterator[dict]:
+		"""
+		Yields all videos of the windows in created_at order, each video only once. Videos created
+		since the windows were partitioned are yielded at the end. Only videos of the shard are
+		yielded if there is one.
+
+		Args:
+			windows (Optional[List[Window]], optional): Windows to walk. Defaults to None which uses windows().
+			limit (int, optional): Maximum number of videos, 0 for all. Defaults to 0.
+
+		Yields:
+			dict: Video objects.
+		"""
+		windows = self.windows() if windows is None else windows
+		if windows and self.scan_end and windows[-1].end == self.scan_end:
+			tail: Optional[Window] = Window(self.scan_end, None)
+		else:
+			tail = None
+
+		todo = deque(window for window in windows if self.shard is None or self.shard.overlaps(window))
+		pending: Deque[Future] = deque()
+		# windows don't overlap, only a video moving across the boundary of the previous window can show up twice
+		previous_ids: Set[str] = set()
+		num_videos = 0
+		with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='window_walker') as executor:
+			try:
+				while True:
+					# keep all walkers busy
+					while len(pending) < self.max_workers and todo:
+						pending.append(executor.submit(self.walk, todo.popleft()))
+
+					# reached the end, check if videos were added in the meantime
+					if not pending:
+						if tail is None:
+							return
+						if self._count(tail).count < 0:
+							self.gaps.append(Gap(tail, -1, 0))
+							return
+						if tail.count == 0:
+							return
+						todo.append(tail)
+						tail = None
+						continue
+
+					window_ids = set()
+					for video in pending.popleft().result() or []:
+						if self.shard and not self.shard.owns(video):
+							continue
+						if (video_id := video.get('id')) not in previous_ids:
+							window_ids.add(video_id)
+							yield video
+							num_videos += 1
+							if limit and num_videos >= limit:
+								return
+					previous_ids = window_ids
+			finally:
+				for future in pending:
+					future.cancel()
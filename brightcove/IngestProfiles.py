@@ -51,6 +51,9 @@ class IngestProfiles(Base):
 	# base URL for all API calls
 	base_url = 'https://ingestion.api.brightcove.com/v1/accounts/{account_id}'
 
+	# read-mostly endpoints which can use a response cache
+	cacheable_endpoints = [ r'/profiles$' ]
+
 	def __init__(self, oauth: OAuth) -> None:
 		"""
 		Args:
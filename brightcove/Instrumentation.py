@@ -0,0 +1,194 @@
+"""
+Per-request instrumentation for all API wrappers.
+
+Base and AsyncBase emit a RequestEvent for every API call to all registered hooks.
+Nothing is measured while no hook is registered.
+
+Example:
+	stats = EndpointStats()
+	add_request_hook(stats)
+	...
+	stats.print_report()
+"""
+
+import re
+import sys
+import random
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+@dataclass
+class RequestEvent:
+	"""
+	Information about a single API call.
+	"""
+	wrapper: str
+	method: str
+	endpoint: str
+	status: int
+	latency: float
+	bytes_in: int
+	bytes_out: int
+	retries: int
+	from_cache: bool
+	account_id: str = ''
+
+# registered hooks, functions receiving a RequestEvent
+_hooks: List[Callable[[RequestEvent], None]] = []
+_hooks_lock = Lock()
+
+def add_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+	"""
+	Registers a function which is called with a RequestEvent after every API call.
+	Hooks are called from the thread (or event loop) making the call and should return quickly.
+	"""
+	with _hooks_lock:
+		_hooks.append(hook)
+
+def remove_request_hook(hook: Callable[[RequestEvent], None]) -> None:
+	"""
+	Removes a registered hook.
+	"""
+	with _hooks_lock:
+		if hook in _hooks:
+			_hooks.remove(hook)
+
+def has_request_hooks() -> bool:
+	"""
+	Returns True if at least one hook is registered.
+	"""
+	return bool(_hooks)
+
+def emit(event: RequestEvent) -> None:
+	"""
+	Calls all registered hooks with an event.
+	"""
+	for hook in list(_hooks):
+		hook(event)
+
+# path segments which are IDs: anything with a digit, except API versions like "v1"
+_id_segment = re.compile(r'^(?!v\d+$)(ref:.*|.*\d.*)$')
+
+def endpoint_template(url: str) -> str:
+	"""
+	Converts a URL into an endpoint template by replacing IDs with placeholders and dropping the query string.
+
+	Example:
+		https://cms.api.brightcove.com/v1/accounts/123/videos/456/sources -> cms.api.brightcove.com/v1/accounts/{account_id}/videos/{id}/sources
+	"""
+	parts = urlsplit(url)
+	segments = parts.path.split('/')
+	for index, segment in enumerate(segments):
+		if _id_segment.match(segment):
+			segments[index] = '{account_id}' if index and segments[index-1] == 'accounts' else '{id}'
+	return parts.netloc + '/'.join(segments)
+
+def account_id_of(url: str) -> str:
+	"""
+	Returns the account ID in the path of a URL, an empty string if there is none.
+	"""
+	segments = urlsplit(url).path.split('/')
+	for index, segment in enumerate(segments[:-1]):
+		if segment == 'accounts':
+			return segments[index+1]
+	return ''
+
+def calling_wrapper(owner: Any) -> str:
+	"""
+	Returns "Class.Method" of the wrapper method of owner which is making the current API call.
+	"""
+	frame = sys._getframe(1) # pylint: disable=protected-access
+	while frame is not None:
+		if frame.f_locals.get('self') is owner:
+			return f'{type(owner).__name__}.{frame.f_code.co_name}'
+		frame = frame.f_back # type: ignore
+	return type(owner).__name__
+
+def body_size(data: Any) -> int:
+	"""
+	Returns the size in bytes of a request body, 0 if it's not str or bytes.
+	"""
+	if isinstance(data, str):
+		return len(data.encode('utf-8'))
+	if isinstance(data, (bytes, bytearray)):
+		return len(data)
+	return 0
+
+class EndpointStats():
+	"""
+	Request hook collecting latency percentiles and error rates per endpoint.
+	Keeps a random sample of at most max_samples latencies per endpoint.
+	"""
+
+	def __init__(self, max_samples: int=10000) -> None:
+		self.max_samples = max_samples
+		self.__lock = Lock()
+		self.__stats: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+	def __call__(self, event: RequestEvent) -> None:
+		key = (event.wrapper, event.method, event.endpoint)
+		with self.__lock:
+			stats = self.__stats.get(key)
+			if stats is None:
+				stats = self.__stats[key] = { 'count': 0, 'errors': 0, 'retries': 0, 'cached': 0, 'bytes_in': 0, 'bytes_out': 0, 'latencies': [] }
+			stats['count'] += 1
+			stats['errors'] += 1 if event.status < 0 or event.status >= 400 else 0
+			stats['retries'] += event.retries
+			stats['cached'] += 1 if event.from_cache else 0
+			stats['bytes_in'] += event.bytes_in
+			stats['bytes_out'] += event.bytes_out
+			latencies = stats['latencies']
+			if len(latencies) < self.max_samples:
+				latencies.append(event.latency)
+			elif (index := random.randrange(stats['count'])) < self.max_samples:
+				latencies[index] = event.latency
+
+	@staticmethod
+	def _percentile(values: List[float], percent: float) -> float:
+		"""
+		Returns the percentile of a sorted list.
+		"""
+		if not values:
+			return 0.0
+		return values[min(len(values)-1, int(len(values) * percent / 100))]
+
+	def report(self) -> List[dict]:
+		"""
+		Returns a row per endpoint, sorted by total time spent.
+		"""
+		rows = []
+		with self.__lock:
+			for (wrapper, method, endpoint), stats in self.__stats.items():
+				latencies = sorted(stats['latencies'])
+				mean = sum(latencies) / len(latencies) if latencies else 0.0
+				rows.append({
+					'wrapper': wrapper,
+					'method': method,
+					'endpoint': endpoint,
+					'count': stats['count'],
+					'error_rate': stats['errors'] / stats['count'],
+					'retries': stats['retries'],
+					'cached': stats['cached'],
+					'bytes_in': stats['bytes_in'],
+					'bytes_out': stats['bytes_out'],
+					'total_time': mean * stats['count'],
+					'p50': self._percentile(latencies, 50),
+					'p90': self._percentile(latencies, 90),
+					'p99': self._percentile(latencies, 99),
+					'max': latencies[-1] if latencies else 0.0,
+				})
+		return sorted(rows, key=lambda row: row['total_time'], reverse=True)
+
+	def print_report(self, file: Optional[Any]=None) -> None:
+		"""
+		Prints the report, to stderr by default.
+		"""
+		file = file or sys.stderr
+		print('\nAPI calls by total time (latencies in ms):', file=file)
+		for row in self.report():
+			print(f'{row["wrapper"]} {row["method"]} {row["endpoint"]}: {row["count"]} calls, '
+				f'{row["error_rate"]*100:.1f}% errors, {row["retries"]} retries, {row["cached"]} cached, '
+				f'p50 {row["p50"]*1000:.0f}, p90 {row["p90"]*1000:.0f}, p99 {row["p99"]*1000:.0f}, max {row["max"]*1000:.0f}, '
+				f'{row["bytes_in"]/1024:.0f} KB in, {row["bytes_out"]/1024:.0f} KB out', file=file)
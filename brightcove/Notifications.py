@@ -0,0 +1,279 @@
+"""
+Receiver for CMS API video change notifications (see CMS.CreateSubscription).
+
+The CMS API posts a small JSON document to every subscribed endpoint whenever the
+metadata of a video changes, e.g.
+	{"timestamp": 1427307045995, "account_id": "57838016001", "event": "video-change", "video": "4151998227001", "version": 26}
+
+The receiver validates notifications, answers right away and queues them. Worker
+threads hand every changed video to a handler, e.g. one fetching the video and
+updating a local catalog. A video which changes again while it's still queued is
+only handled once, a video which changes while it's being handled is handled again
+afterwards, so the last change always wins. Changes the handler failed on are kept
+until retry_failed() queues them again.
+
+Example:
+	receiver = NotificationReceiver(handler, account_ids=['57838016001'], port=8080)
+	receiver.start()
+	...
+	receiver.stop()
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+from threading import Lock, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+from .Decoder import loads
+
+notify_logger = logging.getLogger(__name__)
+
+@dataclass
+class VideoChange:
+	"""
+	A video change notification.
+	"""
+	account_id: str
+	video_id: str
+	timestamp: float
+
+def parse_notification(body: bytes) -> Optional[VideoChange]:
+	"""
+	Parses the body of a notification.
+
+	Args:
+		body (bytes): JSON body posted by the CMS API.
+
+	Returns:
+		Optional[VideoChange]: The change, None if it's a notification for something other than a video.
+
+	Raises:
+		ValueError: If the body is not a valid notification.
+	"""
+	notification = loads(body)
+	if not isinstance(notification, dict):
+		raise ValueError('notification is not a JSON object')
+	if notification.get('event') != 'video-change' or notification.get('entityType', 'VIDEO') != 'VIDEO':
+		return None
+	account_id = str(notification.get('account_id', ''))
+	video_id = str(notification.get('video') or notification.get('entity') or '')
+	if not account_id.isdigit() or not video_id.isdigit():
+		raise ValueError('notification without valid account or video ID')
+	timestamp = notification.get('timestamp')
+	return VideoChange(account_id, video_id, timestamp / 1000 if isinstance(timestamp, (int, float)) else time.time())
+
+class NotificationReceiver():
+	"""
+	HTTP server receiving video change notifications and handing them to a handler in worker threads.
+	"""
+
+	def __init__(self, handler: Callable[[VideoChange], None], account_ids: Iterable[str], host: str='', port: int=8080,
+		path: str='/', token: str='', max_queue: int=10000, workers: int=4, max_body: int=65536) -> None:
+		"""
+		Args:
+			handler (Callable[[VideoChange], None]): Function called for every changed video.
+			account_ids (Iterable[str]): Accounts to accept notifications for.
+			host (str, optional): Address to listen on. Defaults to '' which listens on all addresses.
+			port (int, optional): Port to listen on, 0 for any free port. Defaults to 8080.
+			path (str, optional): Path of the endpoint. Defaults to '/'.
+			token (str, optional): Only accept notifications with this "token" query parameter, which
+				can be added to the callback URL of the subscription. Defaults to ''.
+			max_queue (int, optional): Maximum number of queued videos, more are rejected. Defaults to 10000.
+			workers (int, optional): Number of threads running the handler. Defaults to 4.
+			max_body (int, optional): Maximum size of a notification in bytes, larger ones are rejected. Defaults to 65536.
+		"""
+		self.handler = handler
+		self.account_ids = set(str(account_id) for account_id in account_ids)
+		self.path = path
+		self.token = token
+		self.workers = max(1, workers)
+		self.received = 0
+		self.rejected = 0
+		self.handled = 0
+		self.failed = 0
+		self.max_queue = max_queue
+		self.max_body = max_body
+		self.__queue: 'Queue[Optional[VideoChange]]' = Queue()
+		# videos waiting in the queue, being handled, changed again while being handled and failed
+		self.__queued: Set[Tuple[str, str]] = set()
+		self.__running: Set[Tuple[str, str]] = set()
+		self.__changed: Set[Tuple[str, str]] = set()
+		self.__failed: Dict[Tuple[str, str], VideoChange] = {}
+		self.__lock = Lock()
+		self.__threads: List[Thread] = []
+		self.__server = ThreadingHTTPServer((host, port), self.__request_handler())
+		self.__server.daemon_threads = True
+
+	@property
+	def port(self) -> int:
+		"""
+		Port the receiver is listening on.
+		"""
+		return self.__server.server_address[1]
+
+	def __request_handler(self) -> type:
+		"""
+		Returns the request handler class of the server.
+		"""
+		receiver = self
+
+		class RequestHandler(BaseHTTPRequestHandler):
+			def log_message(self, format, *args): # pylint: disable=redefined-builtin
+				notify_logger.debug(format, *args)
+
+			def do_POST(self):
+				try:
+					length = int(self.headers.get('Content-Length', ''))
+				except ValueError:
+					length = -1
+				if length < 0:
+					code = receiver.reject(400)
+				elif length > receiver.max_body:
+					# don't read the body, the connection can't be reused without it
+					self.close_connection = True
+					code = receiver.reject(413)
+				else:
+					code = receiver.accept(self.path, self.rfile.read(length))
+				self.send_response(code)
+				self.send_header('Content-Length', '0')
+				self.end_headers()
+
+		return RequestHandler
+
+	def accept(self, url: str, body: bytes) -> int:
+		"""
+		Validates and queues a notification.
+
+		Args:
+			url (str): Path and query string the notification was posted to.
+			body (bytes): Body of the request.
+
+		Returns:
+			int: HTTP status code of the response.
+		"""
+		parts = urlsplit(url)
+		if parts.path != self.path:
+			return 404
+		if self.token and parse_qs(parts.query).get('token', [''])[0] != self.token:
+			return self.reject(403)
+		try:
+			change = parse_notification(body)
+		except ValueError as e:
+			notify_logger.warning('Invalid notification: %s', e)
+			return self.reject(400)
+		# accept notifications we don't care about, so they're not sent again
+		if change is None:
+			return 200
+		if change.account_id not in self.account_ids:
+			notify_logger.warning('Notification for unknown account ID %s', change.account_id)
+			return self.reject(403)
+
+		with self.__lock:
+			self.received += 1
+			key = (change.account_id, change.video_id)
+			if key in self.__queued:
+				return 200
+			# handled again once the running handler is done, it might have fetched the video before this change
+			if key in self.__running:
+				self.__changed.add(key)
+				return 200
+			if len(self.__queued) >= self.max_queue:
+				self.rejected += 1
+				return 503
+			self.__queue_change(key, change)
+		return 200
+
+	def reject(self, code: int) -> int:
+		"""
+		Counts a rejected notification.
+
+		Args:
+			code (int): HTTP status code of the response.
+
+		Returns:
+			int: The status code.
+		"""
+		with self.__lock:
+			self.rejected += 1
+		return code
+
+	def __queue_change(self, key: Tuple[str, str], change: VideoChange) -> None:
+		"""
+		Queues a change, the lock must be held.
+		"""
+		self.__queued.add(key)
+		self.__failed.pop(key, None)
+		self.__queue.put(change)
+
+	def __work(self) -> None:
+		"""
+		Hands queued changes to the handler until the stop signal is found.
+		"""
+		while (change := self.__queue.get()) is not None:
+			key = (change.account_id, change.video_id)
+			with self.__lock:
+				self.__queued.discard(key)
+				self.__running.add(key)
+			failed = False
+			try:
+				self.handler(change)
+				self.handled += 1
+			except Exception as e: # pylint: disable=broad-except
+				failed = True
+				self.failed += 1
+				notify_logger.error('Error handling change of video ID %s in account ID %s: %s', change.video_id, change.account_id, e)
+			finally:
+				with self.__lock:
+					self.__running.discard(key)
+					if key in self.__changed:
+						self.__changed.discard(key)
+						self.__queue_change(key, change)
+					elif failed:
+						self.__failed[key] = change
+				self.__queue.task_done()
+		self.__queue.task_done()
+
+	def retry_failed(self) -> int:
+		"""
+		Queues the changes the handler failed on again.
+
+		Returns:
+			int: Number of changes queued.
+		"""
+		with self.__lock:
+			failed = list(self.__failed.items())
+			for key, change in failed:
+				self.__queue_change(key, change)
+		return len(failed)
+
+	def idle(self) -> bool:
+		"""
+		Checks if all received changes have been handled successfully.
+		"""
+		with self.__lock:
+			return self.__queue.unfinished_tasks == 0 and not self.__failed
+
+	def start(self) -> None:
+		"""
+		Starts the server and the worker threads in the background.
+		"""
+		self.__threads = [ Thread(target=self.__work, name=f'notification_worker_{index}', daemon=True) for index in range(self.workers) ]
+		self.__threads.append(Thread(target=self.__server.serve_forever, name='notification_server', daemon=True))
+		for thread in self.__threads:
+			thread.start()
+		notify_logger.info('Receiving notifications on port %d', self.port)
+
+	def stop(self, timeout: float=30.0) -> None:
+		"""
+		Stops the server and waits for the worker threads to handle the queued changes.
+		"""
+		self.__server.shutdown()
+		self.__server.server_close()
+		for _ in range(self.workers):
+			self.__queue.put(None)
+		deadline = time.monotonic() + timeout
+		for thread in self.__threads:
+			thread.join(max(0.0, deadline - time.monotonic()))
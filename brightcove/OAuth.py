@@ -4,18 +4,109 @@ Implements wrapper class and methods to work with Brightcove's OAuth Token API.
 See: https://apis.support.brightcove.com/player-management/
 """
 
+import os
+import json
 import time
+import hashlib
+import logging
+from threading import Lock, Timer
+from typing import Optional, Tuple
 import requests
+from .utils import FileLock
+from .ConnectionPool import PooledSession
+
+oauth_logger = logging.getLogger(__name__)
+
+class TokenCache():
+	"""
+	On-disk access token cache which can be shared by multiple processes.
+
+	Tokens are stored in a JSON file keyed by a hash of the client ID and account ID.
+	All access is serialized with an exclusive lock on a separate lock file.
+	"""
+
+	def __init__(self, filename: str='') -> None:
+		"""
+		Args:
+			filename (str, optional): Path and name of the cache file. Defaults to '' which
+				will use ".brightcove_tokens.json" in the user's home folder.
+		"""
+		self.filename = filename or os.path.expanduser('~')+'/.brightcove_tokens.json'
+
+	@staticmethod
+	def _key(client_id: str, account_id: str) -> str:
+		"""
+		Returns the cache key for a client ID and account ID.
+		"""
+		return hashlib.sha256(f'{client_id}:{account_id}'.encode()).hexdigest()
+
+	def lock(self) -> FileLock:
+		"""
+		Returns the cross-process lock for the cache. Use as context manager.
+		"""
+		return FileLock(self.filename + '.lock')
+
+	def __read(self) -> dict:
+		"""
+		Reads the cache file. Returns an empty dict if it doesn't exist or is invalid.
+		"""
+		try:
+			with open(self.filename, 'r') as file:
+				return json.load(file)
+		except (OSError, ValueError):
+			return {}
+
+	def get(self, client_id: str, account_id: str) -> Tuple[str, float]:
+		"""
+		Gets a cached token. Call while holding the lock.
+
+		Args:
+			client_id (str): Client ID.
+			account_id (str): Brightcove Account ID.
+
+		Returns:
+			Tuple[str, float]: Access token and its expiration time as epoch seconds, ('', 0.0) if there is none.
+		"""
+		entry = self.__read().get(self._key(client_id, account_id), {})
+		return entry.get('access_token', ''), float(entry.get('expires_at', 0.0))
+
+	def put(self, client_id: str, account_id: str, access_token: str, expires_at: float) -> None:
+		"""
+		Stores a token and drops all expired tokens. Call while holding the lock.
+
+		Args:
+			client_id (str): Client ID.
+			account_id (str): Brightcove Account ID.
+			access_token (str): Access token.
+			expires_at (float): Expiration time of the token as epoch seconds.
+		"""
+		now = time.time()
+		data = { key:entry for key, entry in self.__read().items() if entry.get('expires_at', 0) > now }
+		data[self._key(client_id, account_id)] = { 'access_token': access_token, 'expires_at': expires_at }
+		temp_filename = f'{self.filename}.{os.getpid()}.tmp'
+		try:
+			with open(os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as file:
+				json.dump(data, file)
+			os.replace(temp_filename, self.filename)
+		except OSError as e:
+			oauth_logger.info('Error writing token cache %s -> %s', self.filename, e)
 
 class OAuth():
 	"""
 	Implements wrapper class and methods to work with Brightcove's OAuth Token API.
 
+	Tokens are refreshed by a single thread at a time and, as long as the token is being
+	used, in the background shortly before they expire. Request threads only have to wait
+	for the token API if there is no valid token at all.
+
 	Attributes:
 	-----------
 	base_url (str)
 		Base URL for API calls.
 
+	refresh_margin (float)
+		Number of seconds before expiration at which a token is refreshed in the background.
+
 	Properties:
 	-----------
 	access_token(self) -> str:
@@ -28,41 +119,112 @@ class OAuth():
 	# base URL for all API calls
 	base_url = 'https://oauth.brightcove.com/v4/access_token'
 
-	def __init__(self, account_id: str, client_id: str, client_secret: str) -> None:
+	# refresh tokens this many seconds before they expire
+	refresh_margin = 60.0
+
+	# token lifetime to assume if the API doesn't return one
+	default_token_life = 300.0
+
+	# stop using tokens this many seconds before they expire, for requests which are already on their way
+	expiry_headroom = 10.0
+
+	def __init__(self, account_id: str, client_id: str, client_secret: str, token_cache: Optional[TokenCache]=None) -> None:
 		"""
 		Args:
 			account_id (str): Brightcove Account ID.
 			client_id (str): Client ID.
 			client_secret (str): Client Secret.
+			token_cache (Optional[TokenCache], optional): Cache to share tokens with other processes. Defaults to None.
 		"""
 		self.account_id = account_id
 		self.client_id = client_id
 		self.client_secret = client_secret
+		self.token_cache = token_cache
 		self.__access_token = ''
-		self.__request_time = 0.0
-		self.__token_life = 240.0
+		self.__expires_at = 0.0
+		self.__token_used = False
+		self.__lock = Lock()
+		self.__refresh_timer: Optional[Timer] = None
+		self.__session = PooledSession()
 
-	def __get_access_token(self) -> str:
+	def __request_access_token(self) -> Tuple[str, float]:
 		"""
-		Gets access token from API call and stores it along with the request time.
+		Gets access token from API call.
+
+		Returns:
+			Tuple[str, float]: Access token and its expiration time as epoch seconds, ('', 0.0) in case of an error.
 		"""
-		access_token = ''
-		response = requests.post(url=self.base_url, params='grant_type=client_credentials', auth=(self.client_id, self.client_secret))
+		try:
+			response = self.__session.post(url=self.base_url, params='grant_type=client_credentials', auth=(self.client_id, self.client_secret))
+		except requests.exceptions.RequestException as e:
+			oauth_logger.info('Error getting access token -> %s', e)
+			return '', 0.0
+
 		if response.status_code == 200:
-			access_token = response.json().get('access_token','')
-			self.__request_time = time.time()
+			token_data = response.json()
+			token_life = float(token_data.get('expires_in') or self.default_token_life)
+			return token_data.get('access_token',''), time.time() + token_life
+		return '', 0.0
+
+	def __get_access_token(self) -> str:
+		"""
+		Gets access token from the token cache or, if there is no usable one, from an API call.
+		Stores its expiration time and schedules the background refresh of the token.
+		"""
+		if self.token_cache:
+			with self.token_cache.lock():
+				access_token, expires_at = self.token_cache.get(self.client_id, self.account_id)
+				if not access_token or expires_at - time.time() <= self.refresh_margin + self.expiry_headroom:
+					access_token, expires_at = self.__request_access_token()
+					if access_token:
+						self.token_cache.put(self.client_id, self.account_id, access_token, expires_at)
+				else:
+					oauth_logger.info('Using access token from token cache')
+		else:
+			access_token, expires_at = self.__request_access_token()
+
+		if access_token:
+			token_life = expires_at - time.time() - self.expiry_headroom
+			self.__expires_at = time.time() + token_life
+			self.__token_used = False
+			self.__schedule_refresh(max(token_life - self.refresh_margin, token_life / 2))
 		return access_token
 
+	def __schedule_refresh(self, delay: float) -> None:
+		"""
+		Starts a daemon timer refreshing the token after delay seconds.
+		"""
+		if self.__refresh_timer:
+			self.__refresh_timer.cancel()
+		self.__refresh_timer = Timer(delay, self.__background_refresh)
+		self.__refresh_timer.daemon = True
+		self.__refresh_timer.start()
+
+	def __background_refresh(self) -> None:
+		"""
+		Refreshes the token if it was used since the last refresh. Idle tokens are left to expire.
+		"""
+		with self.__lock:
+			if self.__token_used:
+				if access_token := self.__get_access_token():
+					self.__access_token = access_token
+				oauth_logger.info('Access token refreshed in background')
+
 	@property
 	def access_token(self) -> str:
 		"""
 		Gets stored access token for API calls. Refreshes it if it has expired.
 		"""
-		if not self.__access_token:
-			self.__access_token = self.__get_access_token()
-		elif time.time()-self.__request_time > self.__token_life:
-			self.__access_token = self.__get_access_token()
-		return self.__access_token
+		if self.__access_token and time.time() < self.__expires_at:
+			self.__token_used = True
+			return self.__access_token
+
+		with self.__lock:
+			# another thread might have refreshed it while we waited for the lock
+			if not self.__access_token or time.time() >= self.__expires_at:
+				self.__access_token = self.__get_access_token()
+			self.__token_used = True
+			return self.__access_token
 
 	@property
 	def headers(self) -> dict:
@@ -75,6 +75,9 @@ class PlayerManagement(Base):
 	# base URL for all API calls
 	base_url = 'https://players.api.brightcove.com/v2/accounts/{account_id}'
 
+	# read-mostly endpoints which can use a response cache
+	cacheable_endpoints = [ r'/players$' ]
+
 	def __init__(self, oauth: OAuth) -> None:
 		"""
 		Args:
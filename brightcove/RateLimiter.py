@@ -0,0 +1,118 @@
+"""
+Process-wide token bucket rate limiters, keyed by API host.
+
+All API wrapper instances talking to the same host share one bucket, no matter
+if they are used from threads or from an asyncio event loop.
+
+Example:
+	set_rate_limit(CMS.base_url, rate=10, burst=20)
+"""
+
+import asyncio
+import time
+from threading import Lock
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+class TokenBucket():
+	"""
+	Thread-safe and asyncio-safe token bucket.
+
+	Tokens are handed out by reservation: every caller is told how long it has to
+	wait for its token, so waiting never happens while holding the lock.
+	"""
+
+	def __init__(self, rate: float, burst: int=0) -> None:
+		"""
+		Args:
+			rate (float): Steady state number of tokens (requests) per second.
+			burst (int, optional): Maximum number of tokens which can be used at once. Defaults to 0 which means max(1, rate).
+		"""
+		if rate <= 0:
+			raise ValueError(f'Error: rate must be greater than 0, got {rate}')
+		self.rate = float(rate)
+		self.burst = burst if burst > 0 else max(1, int(rate))
+		self.__tokens = float(self.burst)
+		self.__last = time.monotonic()
+		self.__lock = Lock()
+
+	def reserve(self, tokens: int=1) -> float:
+		"""
+		Takes tokens from the bucket.
+
+		Args:
+			tokens (int, optional): Number of tokens to take. Defaults to 1.
+
+		Returns:
+			float: Number of seconds the caller has to wait before using the tokens.
+		"""
+		with self.__lock:
+			now = time.monotonic()
+			self.__tokens = min(float(self.burst), self.__tokens + (now - self.__last) * self.rate)
+			self.__last = now
+			self.__tokens -= tokens
+			if self.__tokens >= 0:
+				return 0.0
+			return -self.__tokens / self.rate
+
+	def acquire(self, tokens: int=1) -> None:
+		"""
+		Takes tokens from the bucket, blocking the calling thread until they are available.
+		"""
+		if delay := self.reserve(tokens):
+			time.sleep(delay)
+
+	async def acquire_async(self, tokens: int=1) -> None:
+		"""
+		Takes tokens from the bucket, suspending the calling coroutine until they are available.
+		"""
+		if delay := self.reserve(tokens):
+			await asyncio.sleep(delay)
+
+# registry of all rate limiters in this process
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = Lock()
+
+def _host(host_or_url: str) -> str:
+	"""
+	Returns the host name of a URL or the argument itself if it's not a URL.
+	"""
+	return (urlsplit(host_or_url).hostname or host_or_url) if '/' in host_or_url else host_or_url
+
+def set_rate_limit(host_or_url: str, rate: float, burst: int=0) -> TokenBucket:
+	"""
+	Sets the rate limit for an API host.
+
+	Args:
+		host_or_url (str): API host name or any URL on the host, e.g. CMS.base_url.
+		rate (float): Requests per second.
+		burst (int, optional): Maximum burst size. Defaults to 0 which means max(1, rate).
+
+	Returns:
+		TokenBucket: The rate limiter for the host.
+	"""
+	bucket = TokenBucket(rate=rate, burst=burst)
+	with _limiters_lock:
+		_limiters[_host(host_or_url)] = bucket
+	return bucket
+
+def remove_rate_limit(host_or_url: str) -> None:
+	"""
+	Removes the rate limit for an API host.
+	"""
+	with _limiters_lock:
+		_limiters.pop(_host(host_or_url), None)
+
+def get_rate_limiter(host_or_url: str) -> Optional[TokenBucket]:
+	"""
+	Gets the rate limiter for an API host.
+
+	Args:
+		host_or_url (str): API host name or any URL on the host.
+
+	Returns:
+		Optional[TokenBucket]: Rate limiter for the host, None if the host isn't rate limited.
+	"""
+	if not _limiters:
+		return None
+	return _limiters.get(_host(host_or_url))
@@ -0,0 +1,241 @@
+"""
+Response caches for read-mostly API endpoints.
+
+A cache is enabled by assigning it to the response_cache attribute of a wrapper
+instance, or of a wrapper class (or Base) to share it between instances. Only GET
+requests to the endpoints listed in the wrapper's cacheable_endpoints are cached.
+
+Entries younger than the TTL are served locally. Older entries are revalidated with
+If-None-Match/If-Modified-Since if the API returned an ETag or Last-Modified header,
+so unchanged data costs a 304 instead of the full payload. Successful POST, PATCH,
+PUT and DELETE requests invalidate the cached entries of the affected resources.
+
+Example:
+	Base.response_cache = DiskResponseCache(ttl=3600)
+"""
+
+import os
+import time
+import json
+import sqlite3
+from os.path import expanduser
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+@dataclass
+class CacheEntry:
+	"""
+	Cached response.
+	"""
+	url: str
+	status_code: int
+	headers: Dict[str, str]
+	content: bytes
+	encoding: Optional[str]
+	stored_at: float
+
+	@classmethod
+	def from_response(cls, response: Response) -> 'CacheEntry':
+		"""
+		Creates a cache entry from a response.
+		"""
+		return cls(url=response.url, status_code=response.status_code, headers=dict(response.headers),
+			content=response.content, encoding=response.encoding, stored_at=time.time())
+
+	def to_response(self) -> Response:
+		"""
+		Creates a requests Response from the cache entry. Its from_cache attribute is True.
+		"""
+		response = Response()
+		response.url = self.url
+		response.status_code = self.status_code
+		response.headers = CaseInsensitiveDict(self.headers)
+		response.encoding = self.encoding
+		response._content = self.content # pylint: disable=protected-access
+		response.from_cache = True # type: ignore
+		return response
+
+class ResponseCache(ABC):
+	"""
+	Abstract base class for response caches with TTL and LRU eviction.
+	"""
+
+	def __init__(self, ttl: float=300.0, max_entries: int=1024) -> None:
+		"""
+		Args:
+			ttl (float, optional): Number of seconds an entry is used without revalidation. Defaults to 300.
+			max_entries (int, optional): Maximum number of entries, least recently used ones are evicted. Defaults to 1024.
+		"""
+		self.ttl = ttl
+		self.max_entries = max_entries
+
+	@abstractmethod
+	def get_entry(self, url: str) -> Optional[CacheEntry]:
+		"""
+		Gets the entry for a URL, None if there is none. Marks the entry as recently used.
+		"""
+
+	@abstractmethod
+	def set_entry(self, url: str, entry: CacheEntry) -> None:
+		"""
+		Stores the entry for a URL, evicting the least recently used entries if the cache is full.
+		"""
+
+	@abstractmethod
+	def invalidate(self, url: str) -> None:
+		"""
+		Removes the entries for a URL, its parent resources and its sub-resources.
+		"""
+
+	@abstractmethod
+	def clear(self) -> None:
+		"""
+		Removes all entries.
+		"""
+
+	@staticmethod
+	def _is_related(key: str, url: str) -> bool:
+		"""
+		Checks if key is the URL itself, one of its parents or one of its sub-resources.
+		"""
+		return key.startswith(url) or url.startswith(key)
+
+	def lookup(self, url: str) -> Tuple[Optional[Response], dict]:
+		"""
+		Looks up a URL before sending the request.
+
+		Args:
+			url (str): URL of the GET request.
+
+		Returns:
+			Tuple[Optional[Response], dict]: The cached response if it can be used without a request,
+				otherwise None and the conditional headers to send along with the request.
+		"""
+		entry = self.get_entry(url)
+		if entry is None:
+			return None, {}
+		if time.time() - entry.stored_at < self.ttl:
+			return entry.to_response(), {}
+
+		headers = {}
+		if etag := entry.headers.get('ETag'):
+			headers['If-None-Match'] = etag
+		if last_modified := entry.headers.get('Last-Modified'):
+			headers['If-Modified-Since'] = last_modified
+		return None, headers
+
+	def update(self, url: str, response: Response) -> Response:
+		"""
+		Updates the cache with the response of a GET request.
+
+		Args:
+			url (str): URL of the GET request.
+			response (Response): Response of the request.
+
+		Returns:
+			Response: The response to hand to the caller, the cached one if the server returned 304.
+				A 304 is returned as is if its entry was evicted in the meantime.
+		"""
+		if response.status_code == 304:
+			if entry := self.get_entry(url):
+				entry.stored_at = time.time()
+				self.set_entry(url, entry)
+				return entry.to_response()
+		elif response.status_code == 200:
+			self.set_entry(url, CacheEntry.from_response(response))
+		return response
+
+class MemoryResponseCache(ResponseCache):
+	"""
+	Thread-safe in-memory response cache.
+	"""
+
+	def __init__(self, ttl: float=300.0, max_entries: int=1024) -> None:
+		super().__init__(ttl=ttl, max_entries=max_entries)
+		self.__entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+		self.__lock = Lock()
+
+	def get_entry(self, url: str) -> Optional[CacheEntry]:
+		with self.__lock:
+			entry = self.__entries.get(url)
+			if entry is not None:
+				self.__entries.move_to_end(url)
+			return entry
+
+	def set_entry(self, url: str, entry: CacheEntry) -> None:
+		with self.__lock:
+			self.__entries[url] = entry
+			self.__entries.move_to_end(url)
+			while len(self.__entries) > self.max_entries:
+				self.__entries.popitem(last=False)
+
+	def invalidate(self, url: str) -> None:
+		with self.__lock:
+			for key in [key for key in self.__entries if self._is_related(key, url)]:
+				del self.__entries[key]
+
+	def clear(self) -> None:
+		with self.__lock:
+			self.__entries.clear()
+
+class DiskResponseCache(ResponseCache):
+	"""
+	Response cache stored in a SQLite database, so it survives between runs. The database
+	is only readable by the user, responses can contain private data.
+	"""
+
+	def __init__(self, filename: str='', ttl: float=300.0, max_entries: int=10000) -> None:
+		"""
+		Args:
+			filename (str, optional): Path and name of the database. Defaults to '' which
+				will use "brightcove_cache.sqlite" in the user's home folder.
+			ttl (float, optional): Number of seconds an entry is used without revalidation. Defaults to 300.
+			max_entries (int, optional): Maximum number of entries, least recently used ones are evicted. Defaults to 10000.
+		"""
+		super().__init__(ttl=ttl, max_entries=max_entries)
+		self.filename = filename or expanduser('~')+'/brightcove_cache.sqlite'
+		self.__lock = Lock()
+		if not os.path.exists(self.filename):
+			os.close(os.open(self.filename, os.O_WRONLY | os.O_CREAT, 0o600))
+		self.__db_conn = sqlite3.connect(self.filename, check_same_thread=False)
+		with self.__lock, self.__db_conn:
+			self.__db_conn.execute('CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, status_code INTEGER NOT NULL, headers TEXT NOT NULL, '
+				'content BLOB NOT NULL, encoding TEXT, stored_at REAL NOT NULL, used_at REAL NOT NULL)')
+			self.__db_conn.execute('CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)')
+			# estimate of the number of entries, only recounted when it's over max_entries
+			self.__num_entries = self.__db_conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+	def get_entry(self, url: str) -> Optional[CacheEntry]:
+		with self.__lock, self.__db_conn:
+			row = self.__db_conn.execute('SELECT status_code, headers, content, encoding, stored_at FROM responses WHERE url=?', (url,)).fetchone()
+			if row is None:
+				return None
+			self.__db_conn.execute('UPDATE responses SET used_at=? WHERE url=?', (time.time(), url))
+		return CacheEntry(url=url, status_code=row[0], headers=json.loads(row[1]), content=row[2], encoding=row[3], stored_at=row[4])
+
+	def set_entry(self, url: str, entry: CacheEntry) -> None:
+		with self.__lock, self.__db_conn:
+			if self.__db_conn.execute('SELECT 1 FROM responses WHERE url=?', (url,)).fetchone() is None:
+				self.__num_entries += 1
+			self.__db_conn.execute('INSERT OR REPLACE INTO responses (url, status_code, headers, content, encoding, stored_at, used_at) VALUES (?,?,?,?,?,?,?)',
+				(url, entry.status_code, json.dumps(entry.headers), entry.content, entry.encoding, entry.stored_at, time.time()))
+			if self.__num_entries > self.max_entries:
+				# other processes may have added or removed entries as well
+				self.__num_entries = self.__db_conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+				if (excess := self.__num_entries - self.max_entries) > 0:
+					self.__db_conn.execute('DELETE FROM responses WHERE url IN (SELECT url FROM responses ORDER BY used_at LIMIT ?)', (excess,))
+					self.__num_entries -= excess
+
+	def invalidate(self, url: str) -> None:
+		with self.__lock, self.__db_conn:
+			self.__num_entries -= self.__db_conn.execute('DELETE FROM responses WHERE substr(url, 1, length(?))=? OR substr(?, 1, length(url))=url', (url, url, url)).rowcount
+
+	def clear(self) -> None:
+		with self.__lock, self.__db_conn:
+			self.__db_conn.execute('DELETE FROM responses')
+			self.__num_entries = 0
@@ -0,0 +1,95 @@
+"""
+Retry policy used by Base and AsyncBase for all API calls.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Mapping, Optional
+
+# HTTP methods which can safely be sent more than once
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+ALL_METHODS = IDEMPOTENT_METHODS | frozenset({'POST', 'PATCH'})
+
+@dataclass(frozen=True)
+class RetryPolicy:
+	"""
+	Exponential backoff with full jitter, honoring Retry-After headers.
+
+	Attributes:
+	-----------
+	max_retries (int)
+		Maximum number of retries after the initial attempt. 0 disables retries.
+	backoff_factor (float)
+		Base delay in seconds, the n-th retry waits up to backoff_factor * 2**n seconds.
+	max_backoff (float)
+		Upper limit in seconds for a single computed delay.
+	retry_on_status (FrozenSet[int])
+		Response status codes which trigger a retry.
+	retry_methods (FrozenSet[str])
+		HTTP methods which are allowed to be retried. Idempotent methods only by default.
+	respect_retry_after (bool)
+		Use the delay from a Retry-After response header if there is one.
+	retry_on_exception (bool)
+		Retry on connection errors and timeouts.
+	"""
+	max_retries: int = 5
+	backoff_factor: float = 0.5
+	max_backoff: float = 60.0
+	retry_on_status: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+	retry_methods: FrozenSet[str] = IDEMPOTENT_METHODS
+	respect_retry_after: bool = True
+	retry_on_exception: bool = True
+
+	def should_retry(self, method: str, attempt: int, status_code: Optional[int]=None) -> bool:
+		"""
+		Checks if a request should be retried.
+
+		Args:
+			method (str): HTTP method of the request.
+			attempt (int): Number of retries already performed.
+			status_code (Optional[int], optional): Response status code, None if the request raised an exception. Defaults to None.
+
+		Returns:
+			bool: True if the request should be sent again, False otherwise.
+		"""
+		if attempt >= self.max_retries or method.upper() not in self.retry_methods:
+			return False
+		if status_code is None:
+			return self.retry_on_exception
+		return status_code in self.retry_on_status
+
+	@staticmethod
+	def _parse_retry_after(value: str) -> Optional[float]:
+		"""
+		Converts a Retry-After header value (seconds or HTTP date) into seconds.
+		"""
+		try:
+			return max(0.0, float(value))
+		except ValueError:
+			pass
+		try:
+			return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+		except (TypeError, ValueError, IndexError):
+			return None
+
+	def get_delay(self, attempt: int, headers: Optional[Mapping[str, str]]=None) -> float:
+		"""
+		Gets the number of seconds to wait before the next retry.
+
+		Args:
+			attempt (int): Number of retries already performed.
+			headers (Optional[Mapping[str, str]], optional): Response headers of the failed request. Defaults to None.
+
+		Returns:
+			float: Delay in seconds.
+		"""
+		if self.respect_retry_after and headers:
+			retry_after = headers.get('Retry-After')
+			if retry_after and (delay := self._parse_retry_after(retry_after)) is not None:
+				return delay
+		return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+# policy to use for calls which must never be retried
+NO_RETRIES = RetryPolicy(max_retries=0)
@@ -0,0 +1,132 @@
+"""
+Request coalescing: concurrent calls with the same key share a single execution.
+
+Used by Base and AsyncBase to merge identical in-flight GET requests into one
+network call, every waiting caller gets the same result (or exception). A successful
+write forgets the in-flight requests of the resources it changed, so requests sent
+after it don't get a response from before it.
+"""
+
+import asyncio
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+class _Call():
+	"""
+	An in-flight call.
+	"""
+	def __init__(self) -> None:
+		self.done = Event()
+		self.result: Any = None
+		self.error: Optional[BaseException] = None
+
+class SingleFlight():
+	"""
+	Thread-safe single-flight group.
+	"""
+
+	def __init__(self) -> None:
+		self.__calls: Dict[Hashable, _Call] = {}
+		self.__lock = Lock()
+
+	def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+		"""
+		Executes func unless a call with the same key is already in flight, in which case
+		it waits for that call and returns its result.
+
+		Args:
+			key (Hashable): Key identifying identical calls.
+			func (Callable[[], Any]): Function to execute.
+
+		Returns:
+			Any: Result of func.
+		"""
+		with self.__lock:
+			in_flight = self.__calls.get(key)
+			if in_flight is None:
+				call = self.__calls[key] = _Call()
+
+		if in_flight is not None:
+			in_flight.done.wait()
+			if in_flight.error:
+				raise in_flight.error
+			return in_flight.result
+
+		try:
+			call.result = func()
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self.__lock:
+				if self.__calls.get(key) is call:
+					del self.__calls[key]
+			call.done.set()
+		return call.result
+
+	def forget(self, matches: Callable[[Any], bool]) -> None:
+		"""
+		Forgets the in-flight calls whose key matches, e.g. because their result may be stale.
+		They still finish for their current callers, later calls with the same key execute again.
+
+		Args:
+			matches (Callable[[Any], bool]): Function returning True for the keys to forget.
+		"""
+		with self.__lock:
+			for key in [key for key in self.__calls if matches(key)]:
+				del self.__calls[key]
+
+class AsyncSingleFlight():
+	"""
+	Single-flight group for coroutines. Calls are only merged within the same event loop.
+	"""
+
+	def __init__(self) -> None:
+		self.__calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+
+	async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+		"""
+		Awaits func() unless a call with the same key is already in flight, in which case
+		it waits for that call and returns its result.
+
+		Args:
+			key (Hashable): Key identifying identical calls.
+			func (Callable[[], Awaitable[Any]]): Coroutine function to execute.
+
+		Returns:
+			Any: Result of func().
+		"""
+		loop = asyncio.get_running_loop()
+		loop_key = (id(loop), key)
+		if (future := self.__calls.get(loop_key)) is not None:
+			return await asyncio.shield(future)
+
+		future = loop.create_future()
+		self.__calls[loop_key] = future
+		try:
+			result = await func()
+		except asyncio.CancelledError:
+			future.cancel()
+			raise
+		except BaseException as e:
+			future.set_exception(e)
+			# mark the exception as retrieved in case nobody else was waiting
+			future.exception()
+			raise
+		else:
+			future.set_result(result)
+			return result
+		finally:
+			if self.__calls.get(loop_key) is future:
+				del self.__calls[loop_key]
+
+	def forget(self, matches: Callable[[Any], bool]) -> None:
+		"""
+		Forgets the in-flight calls whose key matches, e.g. because their result may be stale.
+		They still finish for their current callers, later calls with the same key execute again.
+
+		Args:
+			matches (Callable[[Any], bool]): Function returning True for the keys to forget.
+		"""
+		for loop_key in [loop_key for loop_key in self.__calls if matches(loop_key[1])]:
+			del self.__calls[loop_key]
@@ -4,6 +4,7 @@ Module implementing utility and helper classes and functions for common tasks.
 
 from json.decoder import JSONDecodeError
 from math import isinf, isnan
+import os
 import sys
 import functools
 import csv
@@ -137,6 +138,37 @@ class SimpleTimer():
         elapsed = perf_counter() - self.start
         eprint(f'\n{self.name}: executed in {TimeString.from_seconds(elapsed)}.')
 
+class FileLock():
+    """
+    Class to provide an exclusive lock on a file which works across processes.
+    Uses fcntl on POSIX systems and msvcrt on Windows.
+    """
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.filename, 'a+b')
+        if os.name == 'nt':
+            import msvcrt #pylint: disable=import-outside-toplevel
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1) #type: ignore
+        else:
+            import fcntl #pylint: disable=import-outside-toplevel
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if os.name == 'nt':
+            import msvcrt #pylint: disable=import-outside-toplevel
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1) #type: ignore
+        else:
+            import fcntl #pylint: disable=import-outside-toplevel
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
 
 def empty_function(*args, **kwargs): #pylint: disable = E, W, R, C
     """
@@ -222,13 +254,45 @@ def aspect_ratio(width: int , height: int) -> Tuple[int, int]:
 
     return int(width / divisor), int(height / divisor)
 
-def list_to_csv(row_list: list, filename: str=''):
+def merge_csv_rows(row_list: list, filename: str, merge_key: str) -> list:
+    """
+    Function to merge a list of rows into the rows of an existing CSV file. Rows with the same
+    value in the merge_key column are replaced, new rows are added at the end.
+
+    Args:
+        row_list (list): A list of lists (the rows), the first row is the header.
+        filename (str): Name of the existing CSV file.
+        merge_key (str): Name of the column identifying a row.
+
+    Returns:
+        list: The merged rows, row_list if the file doesn't exist or has a different header.
+    """
+    header = [str(column) for column in row_list[0]]
+    try:
+        with open(filename, newline='', encoding='utf-8') as file:
+            old_rows = list(csv.reader(file))
+    except OSError:
+        return row_list
+    if not old_rows or old_rows[0] != header or merge_key not in header:
+        return row_list
+
+    key_index = header.index(merge_key)
+    merged = { row[key_index]: row for row in old_rows[1:] }
+    for row in row_list[1:]:
+        # csv.writer writes None as an empty field, so the merged rows must do the same
+        row = ['' if value is None else str(value) for value in row]
+        merged[row[key_index]] = row
+    return [header] + list(merged.values())
+
+def list_to_csv(row_list: list, filename: str='', merge_key: str=''):
     """
     Function to write a list of rows to a CSV file.
 
     Args:
         row_list (list): A list of lists (the rows).
         filename (str, optional): Name for the CSV file. Defaults to 'report.csv'.
+        merge_key (str, optional): Merge the rows into an existing file, replacing rows with the
+            same value in this column. Defaults to '' which overwrites the file.
 
     Returns:
         bool: True if CSV successfully created, False otherwise.
@@ -238,6 +302,9 @@ def list_to_csv(row_list: list, filename: str=''):
     if not isinstance(row_list[0], (list, tuple)):
         row_list = [(line,) for line in row_list]
 
+    if merge_key:
+        row_list = merge_csv_rows(row_list, filename if filename else 'report.csv', merge_key)
+
     # write csv file
     try:
         with open(filename if filename else 'report.csv', 'w', newline='', encoding='utf-8') as file:
@@ -248,6 +315,97 @@ def list_to_csv(row_list: list, filename: str=''):
     except csv.Error as e:
         raise csv.Error(f'Error writing CSV data to file: {e}') from e
 
+def concat_csv_files(filenames: Iterable[str], filename: str) -> int:
+    """
+    Function to combine CSV files with the same header into a single CSV file.
+
+    Args:
+        filenames (Iterable[str]): Names of the CSV files to combine.
+        filename (str): Name of the combined CSV file.
+
+    Returns:
+        int: Number of rows written, without the header.
+
+    Raises:
+        csv.Error: if the files have different headers.
+    """
+    header = None
+    num_rows = 0
+    try:
+        with open(filename, 'w', newline='', encoding='utf-8') as out_file:
+            writer = csv.writer(out_file, quoting=csv.QUOTE_ALL, delimiter=',')
+            for input_filename in filenames:
+                with open(input_filename, newline='', encoding='utf-8') as in_file:
+                    reader = csv.reader(in_file)
+                    if (file_header := next(reader, None)) is None:
+                        continue
+                    if header is None:
+                        header = file_header
+                        writer.writerow(header)
+                    elif file_header != header:
+                        raise csv.Error(f'Header of {input_filename} does not match header of the other files')
+                    for row in reader:
+                        writer.writerow(row)
+                        num_rows += 1
+    except OSError as e:
+        raise OSError(f'Error combining CSV files: {e}') from e
+    return num_rows
+
+class CSVAppender():
+    """
+    Class to write rows to a CSV file as soon as they are available, so they are not lost
+    if the script dies. Thread-safe.
+    """
+    def __init__(self, filename: str='', header: Iterable=(), append: bool=False, merge_key: str=''):
+        """
+        Args:
+            filename (str, optional): Name for the CSV file. Defaults to 'report.csv'.
+            header (Iterable, optional): Header row, not written when appending. Defaults to ().
+            append (bool, optional): Append to the file if it exists already. Defaults to False.
+            merge_key (str, optional): Merge the rows into an existing file when closed, replacing rows
+                with the same value in this column. Until then rows go to a ".delta" file. Defaults to ''.
+        """
+        filename = filename if filename else 'report.csv'
+        self._merge_into = ''
+        self._merge_key = merge_key
+        if merge_key and os.path.isfile(filename):
+            self._merge_into = filename
+            filename += '.delta'
+        self._filename = filename
+        append = append and os.path.isfile(filename) and getsize(filename) > 0
+        try:
+            self._file = open(filename, 'a' if append else 'w', newline='', encoding='utf-8')
+        except OSError as e:
+            raise OSError(f'Error creating outputfile: {e}') from e
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_ALL, delimiter=',')
+        self._lock = Lock()
+        if header and not append:
+            self.writerow(header)
+
+    def writerow(self, row: Iterable):
+        """
+        Writes a row and flushes it to the file.
+        """
+        with self._lock:
+            try:
+                self._writer.writerow(row)
+            except csv.Error as e:
+                raise csv.Error(f'Error writing CSV data to file: {e}') from e
+            self._file.flush()
+
+    def close(self):
+        """
+        Closes the file and merges it into the existing file if a merge_key was used.
+        """
+        with self._lock:
+            self._file.close()
+        if self._merge_into:
+            with open(self._filename, newline='', encoding='utf-8') as file:
+                row_list = list(csv.reader(file))
+            if row_list:
+                list_to_csv(row_list, self._merge_into, merge_key=self._merge_key)
+            os.remove(self._filename)
+
 def load_account_info(input_filename: str='') -> Tuple[str, str, str, dict]:
     """
     Function to get information about account from config JSON file.
@@ -147,8 +147,6 @@ def ingest_video(account_id, video_id, source_url, priority_queue, callbacks):
         request_id = response.json().get('id')
         print(f'Ingest Call ({priority_queue}) result for video ID {video_id}: {response.json()}')
         return request_id
-    elif response.status_code==429:
-        pass # implement retries for when the queue is maxed out
     else:
         eprint(f'Ingest Call ({priority_queue}) failed for video ID {video_id}: {response.status_code}')
         eprint(response.text)
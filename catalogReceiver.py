@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+import sys
+import time
+import json
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from requests import post
+from requests.exceptions import RequestException
+from brightcove.CMS import CMS
+from brightcove.OAuth import OAuth
+from brightcove.Catalog import VideoCatalog, format_time
+from brightcove.Notifications import NotificationReceiver, VideoChange
+from brightcove.utils import load_account_info, eprint
+
+# init the argument parsing
+parser = argparse.ArgumentParser(prog=sys.argv[0])
+parser.add_argument('--config', metavar='<config filename>', type=str, help='Name and path of account config information file')
+parser.add_argument('--account', metavar='<Brightcove Account ID(s)>', type=str, help='Comma separated Brightcove Account IDs to use (if different from IDs in config)')
+parser.add_argument('--catalog', metavar='<catalog filename>', type=str, help='Name and path of the catalog database (if different from config)')
+parser.add_argument('--host', metavar='<address>', type=str, default='', help='Address to listen on (default all)')
+parser.add_argument('--port', metavar='<port>', type=int, default=8080, help='Port to listen on (default 8080)')
+parser.add_argument('--path', metavar='<path>', type=str, default='/', help='Path of the notifications endpoint (default /)')
+parser.add_argument('--token', metavar='<token>', type=str, default='', help='Only accept notifications with ?token=<token> in the URL')
+parser.add_argument('--workers', metavar='<number>', type=int, default=4, help='Number of threads fetching changed videos (default 4)')
+parser.add_argument('--lag', metavar='<seconds>', type=float, default=60, help='Maximum delay of notifications, used to keep the catalog fresh (default 60)')
+parser.add_argument('--subscribe', metavar='<callback URL>', type=str, help='Subscribe the public URL of this receiver to video changes of all accounts')
+parser.add_argument('--send', metavar='<video ID>', type=str, help='Send a test notification for a video to a running receiver and exit')
+parser.add_argument('-d', action='store_true', default=False, help='Show debug info messages')
+
+# parse the args
+args = parser.parse_args()
+logging.basicConfig(level=logging.INFO if args.d else logging.WARNING, format='[%(levelname)s:%(lineno)d]: %(message)s')
+
+# get account info from config file
+try:
+	account_id, client_id, client_secret, opts = load_account_info(args.config)
+except Exception as e:
+	print(e)
+	sys.exit(2)
+
+# accounts from the command line override the ones from the config
+account_ids = [ x.strip() for x in args.account.split(',') ] if args.account else [ str(x) for x in opts.get('account_ids') or [account_id] ]
+
+# send a test notification like the CMS API does
+if args.send:
+	url = f'http://{args.host or "127.0.0.1"}:{args.port}{args.path}' + (f'?token={args.token}' if args.token else '')
+	notification = { 'timestamp': int(time.time()*1000), 'account_id': account_ids[0], 'event': 'video-change', 'video': args.send, 'version': 1 }
+	try:
+		print(post(url, data=json.dumps(notification), headers={ 'Content-Type': 'application/json' }, timeout=10).status_code)
+	except RequestException as e:
+		eprint(e)
+		sys.exit(1)
+	sys.exit(0)
+
+# one CMS API instance per account
+cms_apis = { x: CMS(OAuth(account_id=x, client_id=client_id, client_secret=client_secret)) for x in account_ids }
+
+# subscribe to video changes
+if args.subscribe:
+	for x, cms in cms_apis.items():
+		print(f'{x}: {cms.CreateSubscription(callback_url=args.subscribe).text}')
+
+catalog_option = args.catalog or opts.get('catalog')
+catalog = VideoCatalog(catalog_option if isinstance(catalog_option, str) else '')
+
+#===========================================
+# handler applying a change to the catalog
+#===========================================
+def update_catalog(change: VideoChange) -> None:
+	"""
+	Fetches a changed video and stores it in the catalog, or removes it if it was deleted.
+	"""
+	response = cms_apis[change.account_id].GetVideo(video_id=change.video_id)
+	if response.status_code in CMS.success_responses:
+		catalog.store(change.account_id, [response.json()])
+		logging.info('Updated video ID %s in account ID %s', change.video_id, change.account_id)
+	elif response.status_code == 404:
+		catalog.delete(change.account_id, [change.video_id])
+		logging.info('Removed video ID %s in account ID %s', change.video_id, change.account_id)
+	else:
+		response.raise_for_status()
+
+#===========================================
+# keep the catalog fresh
+#===========================================
+def keep_fresh(started_at: datetime) -> None:
+	"""
+	Moves the sync time of accounts forward while all notifications have been handled successfully.
+
+	Only accounts which were synced completely after the receiver started are covered,
+	otherwise changes before the receiver started might be missing from the catalog.
+	"""
+	fresh_until = datetime.now(timezone.utc) - timedelta(seconds=args.lag)
+	for x in account_ids:
+		synced_at = catalog.synced_at(x)
+		if synced_at and started_at <= synced_at < fresh_until:
+			catalog.set_synced(x, format_time(fresh_until))
+
+#===========================================
+# receive notifications until interrupted
+#===========================================
+receiver = NotificationReceiver(update_catalog, account_ids=account_ids, host=args.host, port=args.port, path=args.path,
+	token=args.token, workers=args.workers)
+started_at = datetime.now(timezone.utc)
+receiver.start()
+eprint(f'Receiving notifications for account ID(s) {", ".join(account_ids)} on port {receiver.port}, updating catalog {catalog.filename}.')
+eprint('Run syncCatalog.py once now, the catalog then stays fresh as long as the receiver runs.')
+
+try:
+	while True:
+		time.sleep(min(10.0, args.lag))
+		# the catalog is missing the changes which failed, so it only stays fresh once they're handled
+		if num_failed := receiver.retry_failed():
+			logging.info('Retrying %d failed changes', num_failed)
+		elif receiver.idle():
+			keep_fresh(started_at)
+except KeyboardInterrupt:
+	receiver.stop()
+	eprint(f'\nReceived {receiver.received} changes, {receiver.handled} handled, {receiver.failed} failed, {receiver.rejected} notifications rejected.')
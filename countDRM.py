@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, video_fields
 from brightcove.utils import SimpleProgressDisplay, SimpleTimer
 
 show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
@@ -9,6 +9,7 @@ num_drm_videos = 0
 #===========================================
 # function to check if a video has DRM
 #===========================================
+@video_fields('drm_disabled')
 def count_drm(video: dict):
     global num_drm_videos
     if video.get('drm_disabled') == False:
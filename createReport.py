@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 from threading import Lock
 from csv import Error as CSVError
-from mackee import main, get_args
+from mackee import main, get_args, get_merge_key, process_stage, video_batch, incremental
 from brightcove.utils import list_to_csv, eprint
 from brightcove.utils import SimpleProgressDisplay, SimpleTimer
 from brightcove.utils import get_value, default_split
@@ -16,17 +16,33 @@ row_list = [ ('account_id','id', 'name', 'state', 'reference_id', 'created_at',
 data_lock = Lock()
 show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
 
-def create_report(video: dict) -> None:
+def add_rows(rows: list) -> None:
 	"""
-	Function to add a row of information about a video object to the report.
+	Function to add rows of information about video objects to the report.
 
 	Args:
-		video (dict): video object obtained from the CMS API.
+		rows (list): the rows created by create_report.
 	"""
-	row = (get_value(video, *default_split(field, separator=':', maxsplits=1)) for field in row_list[0])
 	with data_lock:
-		row_list.append(row)
-		show_progress()
+		row_list.extend(rows)
+		show_progress(len(rows))
+
+@incremental(delta=True)
+@video_batch(size=100)
+@process_stage(collect=add_rows)
+def create_report(videos: list) -> list:
+	"""
+	Function to create rows of information about a batch of video objects for the report.
+	Runs in separate processes if --processes is used.
+
+	Args:
+		videos (list): video objects obtained from the CMS API.
+
+	Returns:
+		list: a row for every video.
+	"""
+	fields = [ default_split(field, separator=':', maxsplits=1) for field in row_list[0] ]
+	return [ tuple(get_value(video, *field) for field in fields) for video in videos ]
 
 #===========================================
 # only run code if it's not imported
@@ -38,6 +54,6 @@ if __name__ == '__main__':
         show_progress(force_display=True)
         # write report to CSV file
         try:
-            list_to_csv(row_list, get_args().o)
+            list_to_csv(row_list, get_args().o, merge_key=get_merge_key('id'))
         except (OSError, CSVError) as e:
             eprint(f'\n{e}')
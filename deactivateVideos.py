@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to deactivate a video
 #===========================================
+@incremental(resume=True)
 def deactivate_video(video: dict):
 	"""
 	If a vide is active this will deactiavte it.
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 from threading import Lock
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 from brightcove.utils import SimpleProgressDisplay
 
 data_lock = Lock()
@@ -9,6 +9,7 @@ show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
 #===========================================
 # callback to delete digital masters
 #===========================================
+@incremental(resume=True)
 def delete_masters(video: dict):
     """
     If video has a master this will delete the master.
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to disable DRM
 #===========================================
+@incremental(resume=True)
 def disable_drm(video: dict):
 	"""
 	If video has DRM enabled this will disable DRM.
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import sys
 from threading import Lock
-from mackee import main, get_cms
+from mackee import main, get_async_cms, incremental
 from brightcove.utils import eprint
 
 counter_lock = Lock()
@@ -17,9 +17,11 @@ def show_progress(progress: int):
 #===========================================
 # callback to disable Geo restrictions
 #===========================================
-def disable_geo(video: dict):
+@incremental(resume=True)
+async def disable_geo(video: dict):
 	"""
-	If geo restrictions are enabled this will disable them.
+	If geo restrictions are enabled this will disable them. Runs as async callback,
+	so -a sets the number of API calls in flight instead of the number of threads.
 	"""
 	global videos_processed
 	# does video have Geo restrictions?
@@ -29,7 +31,7 @@ def disable_geo(video: dict):
 		# create the JSON body
 		json_body = { 'geo': None }
 		# make the PATCH call
-		r = get_cms().UpdateVideo(video_id=video_id, json_body=json_body)
+		r = await get_async_cms().UpdateVideo(video_id=video_id, json_body=json_body)
 		# check if all went well
 		if r.status_code not in [200,202]:
 			eprint(f'Error code {r.status_code} disabling Geo for video ID {video_id}:')
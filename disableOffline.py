@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to disable Offline Playback
 #===========================================
+@incremental(resume=True)
 def disable_offline(video: dict):
 	"""
 	If video is enabled for offline payback this will disable it.
@@ -1,11 +1,12 @@
 """
 Script to disable "default" text tracks in videos.
 """
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to disable all default tracks
 #===========================================
+@incremental(resume=True)
 def disable_tt(video: dict):
     """
     This will find text tracks with default tracks and disable those defaults.
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import requests # pip3 install requests
 from clint.textui import progress # pip3 install clint
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # download highest res MP4 from a video
 #===========================================
+@incremental(resume=True)
 def download_video(video: dict):
 	"""
 	This will download the highest resolution MP4 from a video.
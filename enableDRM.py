@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to enable DRM
 #===========================================
+@incremental(resume=True)
 def enable_drm(video: dict):
 	"""
 	If a video is not enabled for DRM this will enable DRM.
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 from threading import Lock
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 from brightcove.utils import eprint
 from brightcove.utils import SimpleProgressDisplay
 
@@ -10,6 +10,7 @@ show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
 #===========================================
 # callback to enable Geo restrictions
 #===========================================
+@incremental(resume=True)
 def enable_geo(video: dict):
     """
     If no geo restrictions are enabled this will add some.
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to enable Offline Playback
 #===========================================
+@incremental(resume=True)
 def enable_offline(video: dict):
 	"""
 	If video is not enabled for offline playback this will enable it.
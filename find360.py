@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, video_fields
 
 #===========================================
 # callback to find 360 videos
 #===========================================
+@video_fields('id', 'name', 'projection')
 def find_360(video: dict):
 	"""
 	Finds videos which are 360/VR enabled.
@@ -1,22 +1,21 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, video_resources, Video, incremental
 from brightcove.utils import aspect_ratio, eprint
 #=============================================
 # callback to find the aspect ratio of videos
 #=============================================
-def find_aspect_ratios(video: dict) -> None:
+@incremental(resume=True)
+@video_resources('renditions')
+def find_aspect_ratios(video: Video) -> None:
     """
     This will print out the aspectratio of a video.
     """
     video_id = video.get('id')
     delivery_type = video.get('delivery_type')
-    source_w, source_h, response = None, None, None
+    source_w, source_h = None, None
 
-    if delivery_type == 'static_origin':
-        response = get_cms().GetRenditionList(video_id=video_id)
-    elif delivery_type == 'dynamic_origin':
-        response = get_cms().GetDynamicRenditions(video_id=video_id)
-    else:
+    response = video.resource('renditions')
+    if response is None:
         eprint(f'No video dimensions found for video ID {video_id} (delivery type: {delivery_type}).')
         return
 
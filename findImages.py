@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, incremental
 
 #===========================================
 # callback to report images for the video
 #===========================================
+@incremental(resume=True)
 def find_images(video: dict):
 	"""
 	Find URLs for poster and thumbnail images.
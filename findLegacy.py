@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, video_fields, incremental
 
 #===========================================
 # callback to find legacy delivery videos
 #===========================================
+@incremental(resume=True)
+@video_fields('id', 'name', 'delivery_type')
 def find_legacy(video: dict):
 	"""
 	Finds videos which are on Legacy Delivery.
@@ -2,7 +2,7 @@
 import time
 from threading import Lock
 from requests.exceptions import RequestException
-from mackee import main, eprint, get_cms, get_args
+from mackee import main, eprint, get_cms, get_args, get_merge_key, incremental
 from brightcove.utils import TimeString, list_to_csv, SimpleProgressDisplay
 
 data_lock = Lock()
@@ -38,6 +38,7 @@ def get_master_storage(video: dict) -> int:
 #===========================================
 # callback getting storage sizes
 #===========================================
+@incremental(delta=True)
 def find_storage_size(video: dict) -> None:
 	"""
 	adds video ID, delivery type and master storage size to report list
@@ -58,7 +59,7 @@ if __name__ == '__main__':
 	show_progress(force_display=True)
 
 	#write list to file
-	list_to_csv(row_list, get_args().o)
+	list_to_csv(row_list, get_args().o, merge_key=get_merge_key())
 
 	elapsed = time.perf_counter() - s
 	eprint(f"\n{__file__} executed in {TimeString.from_seconds(elapsed)}.")
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, incremental
 
 #===========================================
 # callback to find videos with text tracks
 #===========================================
+@incremental(resume=True)
 def find_non_tt(video: dict):
 	"""
 	This prints video IDs which have no text tracks.
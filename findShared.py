@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, incremental
 
 #===========================================
 # callback to find videos into the account
 #===========================================
+@incremental(resume=True)
 def find_shared(video: dict):
 	"""
 	This prints videos which have been shared from an external account.
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
-from mackee import main
+from mackee import main, video_fields, incremental
 
 #===========================================
 # callback to find videos with text tracks
 #===========================================
+@incremental(resume=True)
+@video_fields('id', 'name', 'text_tracks')
 def find_tt(video: dict):
 	"""
 	This will find and list videos which have text tracks.
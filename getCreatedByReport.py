@@ -3,7 +3,7 @@ import time
 from csv import Error as CSVError
 from threading import Lock
 from collections import defaultdict
-from mackee import main, get_cms, get_args
+from mackee import main, get_cms, get_args, video_batch
 from brightcove.utils import list_to_csv, eprint
 from brightcove.utils import SimpleProgressDisplay, TimeString
 
@@ -14,16 +14,18 @@ show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
 #===========================================
 # callback to check who uploaded the video
 #===========================================
-def get_created_by_report(video: dict):
+@video_batch(size=100)
+def get_created_by_report(videos: list):
 	"""
-	Adds creator of the video to the dictionary.
+	Adds creators of a batch of videos to the dictionary.
 	"""
 
-	creator = get_cms().GetCreatedBy(video)
+	creators = [ get_cms().GetCreatedBy(video) for video in videos ]
 
 	with data_lock:
-		created_by_dict[creator] += 1
-		show_progress()
+		for creator in creators:
+			created_by_dict[creator] += 1
+		show_progress(len(videos))
 
 #===========================================
 # only run code if it's not imported
@@ -1,32 +1,92 @@
 #!/usr/bin/env python3
 from __future__ import print_function
+import re
 import sys
+import atexit
 import argparse
 import time
 import logging
-from os import path
+import sqlite3
+import asyncio
+import inspect
+import functools
+import multiprocessing
+from os import path, cpu_count
+from glob import glob, escape as glob_escape
+from csv import Error as CSVError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from urllib.parse import quote
 from json import JSONDecodeError
 from queue import Queue, Empty
-from typing import cast, Callable, Dict, Any
-from threading import Thread
+from typing import Callable, Dict, Any, Iterable, List, Optional, Set, Tuple, Type, TypeVar
+from threading import Thread, local
 from xlrd import XLRDError
 from pandas.errors import ParserError
 from requests.exceptions import RequestException
 from requests.models import Response
 import requests # pip3 install requests
 
-from brightcove.OAuth import OAuth
+from brightcove.OAuth import OAuth, TokenCache
 from brightcove.CMS import CMS
+from brightcove.Enumerator import VideoEnumerator, Shard, parse_timestamp, format_timestamp
+from brightcove.Checkpoint import Checkpoint, HighWaterMark
+from brightcove.Catalog import VideoCatalog
+from brightcove.Concurrency import AIMDLimiter
 from brightcove.DynamicIngest import DynamicIngest
+from brightcove.AsyncBase import AsyncBase, AsyncSession
+from brightcove.AsyncAPI import AsyncCMS
+from brightcove.ConnectionPool import PooledSession, configure_connection_pools, get_pool_maxsize
+from brightcove.ResponseCache import DiskResponseCache
+from brightcove.Base import Base
+from brightcove.Instrumentation import EndpointStats, add_request_hook, remove_request_hook
 
 from brightcove.utils import eprint, static_vars, load_account_info
-from brightcove.utils import videos_from_file
+from brightcove.utils import videos_from_file, concat_csv_files
 
 mac_logger = logging.getLogger()
 
+AsyncAPI = TypeVar('AsyncAPI', bound=AsyncBase)
+
 # disable certificate warnings
 requests.urllib3.disable_warnings() #type: ignore
 
+#===========================================
+# API instances of a single account
+#===========================================
+class AccountContext():
+    """
+    OAuth, CMS and DI instances for a single account. Threads which activated a context get these
+    instances from get_oauth(), get_cms() and get_di(), so accounts can be processed in parallel
+    without changing the account ID of the shared instances.
+    """
+    _local = local()
+
+    def __init__(self, account_id: str):
+        """
+        Args:
+            account_id (str): Brightcove account ID.
+        """
+        oauth = get_oauth()
+        self.oauth = OAuth(account_id, oauth.client_id, oauth.client_secret, token_cache=oauth.token_cache)
+        self.cms = CMS(oauth=self.oauth, query=get_cms().search_query)
+        self.cms.fast_json = get_cms().fast_json
+        self.di = DynamicIngest(oauth=self.oauth)
+
+    def activate(self) -> None:
+        """
+        Makes this the context of the current thread.
+        """
+        AccountContext._local.current = self
+
+    @staticmethod
+    def current() -> Optional['AccountContext']:
+        """
+        Returns the context of the current thread, None if it has none.
+        """
+        return getattr(AccountContext._local, 'current', None)
+
 #===========================================
 # returns a DI instance
 #===========================================
@@ -43,6 +103,9 @@ def get_di(oauth: OAuth=None, profile: str='', priority: str='normal') -> Dynami
     Returns:
         DynamicIngest: DynamicIngest instance. None if none was created yet.
     """
+    if context := AccountContext.current():
+        return context.di
+
     if not get_di.di and oauth:
         get_di.di = DynamicIngest(oauth=oauth, ingest_profile=profile, priority_queue=priority)
         mac_logger.info('Obtained DI instance')
@@ -61,18 +124,56 @@ def get_cms(oauth: OAuth=None, query: str='') -> CMS:
     Returns:
         CMS: CMS instance. None if none was created yet.
     """
+    if context := AccountContext.current():
+        return context.cms
+
     if not get_cms.cms and oauth:
         get_cms.cms = CMS(oauth=oauth, query=query)
+        get_cms.cms.fast_json = get_args().fast_json
         mac_logger.info('Obtained CMS instance')
     return get_cms.cms
 
+# async API instances of the current thread
+_async_apis = local()
+
+def get_async_api(api_class: Type[AsyncAPI]) -> AsyncAPI:
+    """
+    Returns an instance of an async API class (see brightcove/AsyncAPI.py) for async callbacks.
+    Uses the same account as get_oauth(). Creates one if it doesn't exist yet.
+
+    Args:
+        api_class (Type[AsyncAPI]): the class, e.g. AsyncCMS
+
+    Returns:
+        AsyncAPI: instance of the class
+    """
+    apis = _async_apis.__dict__.setdefault('apis', {})
+    if api_class not in apis:
+        apis[api_class] = api_class(get_oauth())
+        mac_logger.info('Obtained %s instance', api_class.__name__)
+    return apis[api_class]
+
+def get_async_cms() -> AsyncCMS:
+    """
+    Returns an AsyncCMS instance for async callbacks. Creates one if it doesn't exist yet.
+    """
+    apis = _async_apis.__dict__.setdefault('apis', {})
+    if AsyncCMS not in apis:
+        apis[AsyncCMS] = AsyncCMS(oauth=get_oauth(), query=get_cms().search_query)
+        apis[AsyncCMS].fast_json = get_cms().fast_json
+        mac_logger.info('Obtained AsyncCMS instance')
+    return apis[AsyncCMS]
+
 @static_vars(oauth=None)
-def get_oauth(account_id: str='', client_id: str='', client_secret: str='') -> OAuth:
+def get_oauth(account_id: str='', client_id: str='', client_secret: str='', token_cache: Optional[TokenCache]=None) -> OAuth:
     """
     Returns an OAuth instance. Creates one if it doesn't exist yet.
     """
+    if context := AccountContext.current():
+        return context.oauth
+
     if not get_oauth.oauth:
-        get_oauth.oauth = OAuth(account_id, client_id, client_secret)
+        get_oauth.oauth = OAuth(account_id, client_id, client_secret, token_cache=token_cache)
         mac_logger.info('Obtained OAuth instance')
     return get_oauth.oauth
 
@@ -93,9 +194,30 @@ def get_args():
         parser.add_argument('-a', type=int, const=10, nargs='?', help='Async processing of videos')
         parser.add_argument('-d', action='store_true', default=False, help='Show debug info messages')
         parser.add_argument('-l', type=int, const=0, nargs='?', help='Limit to first x amount of videos')
+        parser.add_argument('-r', type=float, help='Max API requests per second and API host')
+        parser.add_argument('-s', action='store_true', default=False, help='Show API call statistics per endpoint at the end')
+        parser.add_argument('-w', type=int, default=1000, help='Max number of videos waiting in the work queue (0 for unlimited)')
+        parser.add_argument('-p', type=int, const=4, nargs='?', help='Number of threads counting and fetching videos')
+        parser.add_argument('--resume', action='store_true', default=False, help='Resume an interrupted run, skipping videos already processed')
+        parser.add_argument('--delta', action='store_true', default=False, help='Only process videos updated since the last --delta run')
+        parser.add_argument('--adaptive', type=int, const=1, nargs='?', help='Adjust the number of active workers between this minimum and -a')
+        parser.add_argument('--accounts', type=int, default=1, help='Number of accounts processed at the same time')
+        parser.add_argument('--processes', type=int, const=cpu_count(), nargs='?', help='Number of processes running callbacks which support it')
+        parser.add_argument('--shard', type=str, help='Only process shard i of N (e.g. 2/4) and write its own output file')
+        parser.add_argument('--merge-shards', action='store_true', default=False, help='Combine the output files of all shards into the -o file')
+        parser.add_argument('--catalog', type=float, const=60, nargs='?', help='Get videos from the local catalog if it was synced within this many minutes')
+        parser.add_argument('--fast-json', action='store_true', default=False, help='Decode CMS API responses with orjson or ujson if installed')
 
         get_args.args = parser.parse_args()
 
+        # every shard writes its own output file
+        if get_args.args.shard:
+            try:
+                get_args.args.shard = Shard.parse(get_args.args.shard)
+            except ValueError as e:
+                parser.error(f'argument --shard: {e}')
+            get_args.args.o = get_shard_filename(get_args.args.o or 'report.csv', get_args.args.shard)
+
         if get_args.args.d:
             logging.basicConfig(level=logging.INFO, format='[%(levelname)s:%(lineno)d]: %(message)s')
             mac_logger.info('Logging at INFO level enabled')
@@ -109,22 +231,335 @@ def get_args():
 @static_vars(session=None)
 def get_session():
     """
-    Returns a requests session. Creates one if it doesn't exist yet.
+    Returns a requests session using the shared connection pools. Creates one if it doesn't exist yet.
     """
     if not get_session.session:
-        get_session.session = requests.Session()
+        get_session.session = PooledSession()
         mac_logger.info('Obtained Requests Session')
     return get_session.session
 
+@static_vars(pool=None)
+def get_process_pool(max_workers: int=0) -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the process pool for callbacks. Creates one if a number of processes is provided.
+    """
+    if not get_process_pool.pool and max_workers:
+        # forked processes inherit the API instances, but not their connections
+        start_methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork') if 'fork' in start_methods else None
+        get_process_pool.pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=configure_connection_pools,
+                                                    initargs=(get_pool_maxsize(),))
+        # start all processes now, before any other threads are running
+        get_process_pool.pool.submit(int).result()
+        mac_logger.info('Started %d callback processes', max_workers)
+    return get_process_pool.pool
+
+@static_vars(pool=None)
+def get_prefetch_pool(max_workers: int=0) -> Optional[ThreadPoolExecutor]:
+    """
+    Returns the thread pool fetching sub-resources declared with video_resources. Creates one if a number of threads is provided.
+    """
+    if not get_prefetch_pool.pool and max_workers:
+        get_prefetch_pool.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        mac_logger.info('Started %d sub-resource fetching threads', max_workers)
+    return get_prefetch_pool.pool
+
+@static_vars(catalog=None)
+def get_catalog() -> VideoCatalog:
+    """
+    Returns the local video catalog. Opens it if it's not open yet, "catalog" in the config can be used to set the filename.
+    """
+    if not get_catalog.catalog:
+        filename = get_opts().get('catalog')
+        get_catalog.catalog = VideoCatalog(filename if isinstance(filename, str) else '')
+        mac_logger.info('Opened video catalog %s', get_catalog.catalog.filename)
+    return get_catalog.catalog
+
+@static_vars(accounts=[])
+def get_complete_accounts() -> List[str]:
+    """
+    Returns the IDs of the accounts of which all videos were enumerated without gaps and processed without errors.
+    """
+    return get_complete_accounts.accounts
+
 @static_vars(opts=None)
 def get_opts(opts: dict = None) -> dict:
     if get_opts.opts is None:
         get_opts.opts = opts
     return get_opts.opts
 
+#===========================================
+# decorator to declare the video fields used
+#===========================================
+def video_fields(*fields: str, prefilter: Optional[Callable[[dict], bool]]=None):
+    """
+    Decorator for callbacks to declare the top-level video fields they use.
+
+    When processing a whole account and the light video objects from the lightvideos
+    endpoint contain all those fields, light objects are used, which are a lot smaller.
+    With a prefilter the callback still gets the full video object, but it is only
+    fetched for videos for which prefilter (called with the light object) returns True.
+    The prefilter is also applied if light objects can't be used.
+
+    Args:
+        fields (str): Names of the fields used by the callback, or by the prefilter if one is given.
+        prefilter (Optional[Callable[[dict], bool]], optional): Function deciding which videos the callback needs. Defaults to None.
+
+    Example:
+        @video_fields('id', 'name', 'delivery_type')
+        def find_legacy(video: dict):
+            ...
+    """
+    def decorate(func):
+        func.video_fields = fields
+        func.prefilter = prefilter
+        return func
+    return decorate
+
+def process_stage(collect: Callable[[Any], None]):
+    """
+    Decorator for callbacks doing CPU heavy work, like parsing manifests or building large rows.
+
+    The callback returns its result instead of storing it and collect is called with the result
+    in the main process, where the report is written. With --processes the callbacks run in a
+    pool of processes, so they are not limited by the GIL, while the main process keeps doing
+    the API calls. Otherwise they run in the worker threads like all other callbacks.
+
+    The callback must be a module level function and should not make API calls itself.
+
+    Args:
+        collect (Callable[[Any], None]): Function called with the result of the callback.
+
+    Example:
+        def add_row(row: list):
+            row_list.append(row)
+
+        @process_stage(collect=add_row)
+        def build_row(video: dict) -> list:
+            ...
+    """
+    def decorate(func):
+        func.collect = collect
+        return func
+    return decorate
+
+def video_batch(size: int=100):
+    """
+    Decorator for callbacks which process videos in batches instead of one at a time.
+
+    The callback is called with a list of up to size video objects, so it can build rows in bulk,
+    make API calls for several videos together and update shared state once per batch instead of
+    once per video. Videos queued by ID are fetched with one API call for every 10 videos.
+    Batches are filled with whatever is queued, so they can be smaller than size.
+    Async callbacks are not supported.
+
+    Args:
+        size (int, optional): Maximum number of videos per batch. Defaults to 100.
+
+    Example:
+        @video_batch(size=50)
+        def build_rows(videos: list):
+            rows = [ ... for video in videos ]
+            with data_lock:
+                row_list.extend(rows)
+    """
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            raise TypeError('video_batch does not support async callbacks')
+        func.batch_size = max(1, size)
+        return func
+    return decorate
+
+def incremental(delta: bool=False, resume: bool=False):
+    """
+    Decorator for callbacks of scripts which support --delta and/or --resume, both are rejected otherwise.
+
+    A --delta run only processes the videos changed since the last run, so a script should only
+    support it if it keeps the results of earlier runs, e.g. by merging its rows into the existing
+    report (see get_merge_key). A --resume run only processes the videos the interrupted run didn't
+    get to, so a script should only support it if the output of the interrupted run is kept, e.g.
+    because it changes videos or writes its results as it goes.
+
+    Args:
+        delta (bool, optional): The script supports --delta. Defaults to False.
+        resume (bool, optional): The script supports --resume. Defaults to False.
+
+    Example:
+        @incremental(resume=True)
+        def retranscode(video: dict):
+            ...
+    """
+    def decorate(func):
+        func.supports_delta = delta
+        func.supports_resume = resume
+        return func
+    return decorate
+
+def get_renditions(cms_obj: CMS, video: dict) -> Optional[Response]:
+    """
+    Gets the renditions of a video, legacy or dynamic delivery. None for other delivery types.
+    """
+    if video.get('delivery_type') == 'static_origin':
+        return cms_obj.GetRenditionList(video_id=video['id'])
+    if video.get('delivery_type') == 'dynamic_origin':
+        return cms_obj.GetDynamicRenditions(video_id=video['id'])
+    return None
+
+# sub-resources which can be declared by name with video_resources
+# the functions get the CMS instance and the video and return None if the video doesn't have the sub-resource
+VIDEO_RESOURCES: Dict[str, Callable[[CMS, dict], Optional[Response]]] = {
+    'sources': lambda cms_obj, video: cms_obj.GetVideoSources(video_id=video['id']),
+    'images': lambda cms_obj, video: cms_obj.GetVideoImages(video_id=video['id']),
+    'audio_tracks': lambda cms_obj, video: cms_obj.GetVideoAudioTracks(video_id=video['id']),
+    'variants': lambda cms_obj, video: cms_obj.GetAllVideoVariants(video_id=video['id']),
+    'assets': lambda cms_obj, video: cms_obj.GetAssets(video_id=video['id']),
+    'digital_master': lambda cms_obj, video: cms_obj.GetDigitalMasterInfo(video_id=video['id']) if video.get('has_digital_master') else None,
+    'renditions': get_renditions,
+}
+
+class Video(dict):
+    """
+    Video object together with the sub-resources its callback declared with video_resources.
+    """
+    def __init__(self, video: dict, resources: Dict[str, Any]):
+        super().__init__(video)
+        self.resources = resources
+
+    def resource(self, name: str) -> Optional[Response]:
+        """
+        Returns the API response for a sub-resource, None if the video doesn't have it.
+
+        Raises:
+            RequestException: if the sub-resource could not be fetched.
+        """
+        result = self.resources.get(name)
+        if isinstance(result, RequestException):
+            raise result
+        return result
+
+def video_resources(*names: str, **fetchers: Callable[[CMS, dict], Optional[Response]]):
+    """
+    Decorator for callbacks to declare the sub-resources of a video they need, like its renditions.
+
+    Before the callback runs all sub-resources of the video are fetched at the same time (and
+    for all videos of a batch, see video_batch), so a video takes as long as the slowest call
+    instead of all of them in a row. The callback gets a Video, which is the video object with
+    a resource(name) method returning the API response for a sub-resource. Async callbacks are
+    not supported, they can gather their calls themselves.
+
+    Args:
+        names (str): Names of sub-resources from VIDEO_RESOURCES, e.g. 'renditions' or 'sources'.
+        fetchers (Callable[[CMS, dict], Optional[Response]]): Other sub-resources by name, functions getting
+            the CMS instance and the video which return the API response or None if the video doesn't have it.
+
+    Example:
+        @video_resources('digital_master', 'renditions')
+        def storage_size(video: Video):
+            response = video.resource('renditions')
+            ...
+    """
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            raise TypeError('video_resources does not support async callbacks')
+        if unknown := [name for name in names if name not in VIDEO_RESOURCES]:
+            raise ValueError(f'unknown video resources: {", ".join(unknown)}')
+        func.video_resources = { **{ name: VIDEO_RESOURCES[name] for name in names }, **fetchers }
+        return func
+    return decorate
+
+def fetch_resource(fetcher: Callable[[CMS, dict], Optional[Response]], cms_obj: CMS, video: dict) -> Any:
+    """
+    Function to get a sub-resource of a video, returns the exception if the request failed.
+    """
+    try:
+        return fetcher(cms_obj, video)
+    except RequestException as e:
+        return e
+
+def run_prefetch_stage(process_callback: Callable) -> Callable:
+    """
+    Function to wrap a callback decorated with video_resources, so the sub-resources of the
+    video (or of all videos of a batch) are fetched at the same time before it runs.
+
+    Args:
+        process_callback (Callable): the callback
+
+    Returns:
+        Callable: the wrapped callback, or the callback if it doesn't declare sub-resources
+    """
+    resources = getattr(process_callback, 'video_resources', None)
+    if not resources:
+        return process_callback
+
+    @functools.wraps(process_callback)
+    def run(videos) -> None:
+        # the CMS instance of the worker thread's account
+        cms_obj = get_cms()
+        video_list = videos if isinstance(videos, list) else [videos]
+        pool = get_prefetch_pool()
+        futures = [ { name: pool.submit(fetch_resource, fetcher, cms_obj, video) for name, fetcher in resources.items() } for video in video_list ]
+        enriched = [ Video(video, { name: future.result() for name, future in video_futures.items() }) for video, video_futures in zip(video_list, futures) ]
+        process_callback(enriched if isinstance(videos, list) else enriched[0])
+    return run
+
+def run_batch_callback(process_callback: Callable) -> Callable:
+    """
+    Function to wrap a callback decorated with video_batch so it can be called with a single video.
+    """
+    @functools.wraps(process_callback)
+    def run(video: dict) -> None:
+        process_callback([video])
+    return run
+
+def run_process_stage(process_callback: Callable) -> Callable:
+    """
+    Function to wrap a callback decorated with process_stage, so it runs in the process pool
+    (if there is one) and its result is collected in the main process.
+
+    Args:
+        process_callback (Callable): the callback
+
+    Returns:
+        Callable: the wrapped callback, or the callback if it's not a process stage
+    """
+    collect = getattr(process_callback, 'collect', None)
+    if collect is None:
+        return process_callback
+
+    @functools.wraps(process_callback)
+    def run(video: dict) -> None:
+        if pool := get_process_pool():
+            collect(pool.submit(process_callback, video).result())
+        else:
+            collect(process_callback(video))
+    return run
+
+def light_videos_usable(cms_obj: CMS, account_id: str, fields: Tuple[str, ...]) -> bool:
+    """
+    Function to check if the light video objects of an account contain all fields.
+
+    Args:
+        cms_obj (CMS): CMS class instance
+        account_id (str): Video Cloud account ID
+        fields (Tuple[str, ...]): names of the fields
+
+    Returns:
+        bool: True if the fields are in the light objects, False otherwise
+    """
+    try:
+        response = cms_obj.GetLightVideos(page_size=10, account_id=account_id)
+    except RequestException:
+        return False
+    if response.status_code not in CMS.success_responses or not (videos := response.json()):
+        return False
+    # the enumeration itself needs the IDs and creation dates
+    keys = set().union(*(video.keys() for video in videos))
+    return set(fields).union(('id', 'created_at')).issubset(keys)
+
 #===========================================
 # default processing function
 #===========================================
+@incremental(resume=True)
 @static_vars(print_header=True)
 def list_videos(video: dict) -> None:
     """
@@ -154,87 +589,319 @@ def get_accounts(account_parameter: str) -> list:
 def limit(input_value: int, limit_value: int) -> int:
     return min(input_value, limit_value) if limit_value else input_value
 
+def get_checkpoint(account_id: str) -> Checkpoint:
+    """
+    Function to get the checkpoint for the current script, account, search query and input file.
+    Progress is always recorded and only used if --resume was passed.
+
+    Args:
+        account_id (str): Video Cloud account ID
+
+    Returns:
+        Checkpoint: the checkpoint
+    """
+    run = '|'.join([get_run_name(account_id), path.abspath(get_args().x) if get_args().x else '', 'delta' if get_args().delta else ''])
+    checkpoint = Checkpoint(run, get_checkpoint_filename(), resume=get_args().resume)
+    atexit.register(checkpoint.flush)
+    return checkpoint
+
+def finish_checkpoint(checkpoint: Checkpoint, complete: bool=True) -> None:
+    """
+    Function to end the run of a checkpoint. It's only marked as finished, and doesn't have to be
+    written at exit anymore, if all videos were handed out, otherwise a resumed run goes on from it.
+
+    Args:
+        checkpoint (Checkpoint): the checkpoint of the run
+        complete (bool, optional): all videos were enumerated without gaps. Defaults to True.
+    """
+    if complete:
+        checkpoint.finish()
+        atexit.unregister(checkpoint.flush)
+    else:
+        checkpoint.flush()
+    if checkpoint.failed_ids:
+        eprint(f'{len(checkpoint.failed_ids)} videos could not be processed.')
+
+def checkpoint_done(checkpoint: Optional[Checkpoint], video_id: str, failed: bool) -> None:
+    """
+    Function to mark a video as processed in a checkpoint. Database errors are only reported,
+    so the worker still marks the video as done in the queue.
+    """
+    if checkpoint:
+        try:
+            # failed videos are retried by a resumed run
+            checkpoint.done(video_id, failed=failed)
+        except sqlite3.Error as e:
+            eprint(f'Error updating checkpoint for video ID {video_id}: {e}')
+
+def queue_failed(work_queue: Queue, checkpoint: Optional[Checkpoint]) -> None:
+    """
+    Function to add the IDs of the videos the interrupted run failed to process to a Queue, so they're retried.
+    """
+    if checkpoint and checkpoint.failed_ids:
+        eprint(f'Retrying {len(checkpoint.failed_ids)} videos which could not be processed before.')
+        for video_id in sorted(checkpoint.failed_ids):
+            work_queue.put(video_id)
+
+def get_limiter(max_workers: int, account_id: str) -> Optional[AIMDLimiter]:
+    """
+    Function to get an adaptive limit for the number of active workers if --adaptive was passed.
+    The limit follows the API calls for the account until release_limiter is called, so with
+    --accounts every account's workers only react to their own account's calls.
+
+    Args:
+        max_workers (int): highest number of active workers
+        account_id (str): Video Cloud account ID
+
+    Returns:
+        Optional[AIMDLimiter]: the limiter, None if the number of workers is fixed
+    """
+    if get_args().adaptive is None:
+        return None
+    limiter = AIMDLimiter(min_limit=get_args().adaptive, max_limit=max_workers, account_id=account_id)
+    add_request_hook(limiter)
+    return limiter
+
+def release_limiter(limiter: Optional[AIMDLimiter], account_id: str) -> None:
+    """
+    Function to stop adjusting a limiter and report the number of workers it settled on.
+    """
+    if limiter:
+        remove_request_hook(limiter)
+        eprint(f'Account ID {account_id}: {limiter.summary()}')
+
+def get_delta_mark(account_id: str) -> HighWaterMark:
+    """
+    Function to get the time of the last completed --delta run of the current script
+    with the same account and search query.
+
+    Args:
+        account_id (str): Video Cloud account ID
+
+    Returns:
+        HighWaterMark: the high-water mark
+    """
+    return HighWaterMark(get_run_name(account_id), get_checkpoint_filename())
+
+def get_run_name(account_id: str) -> str:
+    """
+    Returns a name for runs of the current script with an account, the search query and the shard.
+    """
+    run_name = '|'.join([path.basename(sys.argv[0]), account_id, get_args().q or ''])
+    if get_args().shard:
+        run_name += f'|shard {get_args().shard}'
+    return run_name
+
+def get_shard_filename(filename: str, shard: Shard) -> str:
+    """
+    Returns the name of the output file of a shard, e.g. report.shard-2-of-4.csv for report.csv.
+    """
+    root, ext = path.splitext(filename)
+    return f'{root}.shard-{shard.index+1}-of-{shard.count}{ext}'
+
+def merge_shards(filename: str) -> bool:
+    """
+    Function to combine the output files of all shards of a run into the final CSV file.
+    Works for reports with a row per video, the rows of all shards are simply concatenated.
+
+    Args:
+        filename (str): name of the final CSV file, the -o used for the shards
+
+    Returns:
+        bool: True if the output files of all shards were found and combined, False otherwise
+    """
+    root, ext = path.splitext(filename)
+    pattern = re.compile(re.escape(path.basename(root)) + r'\.shard-(\d+)-of-(\d+)' + re.escape(ext) + '$')
+    shard_files = {}
+    for shard_file in glob(f'{glob_escape(root)}.shard-*-of-*{glob_escape(ext)}'):
+        if match := pattern.match(path.basename(shard_file)):
+            shard_files[int(match.group(1)), int(match.group(2))] = shard_file
+
+    counts = { count for _, count in shard_files }
+    if len(counts) != 1:
+        eprint(f'Expected output files of one sharded run for {filename}, found {len(shard_files)} files of {len(counts)} runs.')
+        return False
+    count = counts.pop()
+    if missing := [str(number) for number in range(1, count+1) if (number, count) not in shard_files]:
+        eprint(f'Missing output files of shards {", ".join(missing)} of {count} for {filename}.')
+        return False
+
+    try:
+        num_rows = concat_csv_files([shard_files[number, count] for number in range(1, count+1)], filename)
+    except (OSError, CSVError) as e:
+        eprint(e)
+        return False
+    eprint(f'Combined {num_rows} rows of {count} shards into {filename}.')
+    return True
+
+def get_checkpoint_filename() -> str:
+    """
+    Returns the filename of the checkpoint database, "checkpoint" in the config can be used to set it.
+    """
+    filename = get_opts().get('checkpoint')
+    return filename if isinstance(filename, str) else ''
+
+def get_merge_key(key: str='video_id') -> str:
+    """
+    Function for scripts writing a CSV report with a row per video: returns the column to merge
+    the rows of a --delta run into the existing report with, an empty string otherwise.
+
+    Args:
+        key (str, optional): Name of the column with the video ID. Defaults to 'video_id'.
+
+    Returns:
+        str: the column name or an empty string
+    """
+    return key if get_args().delta else ''
+
 #===========================================
 # function to fill queue with all videos
 # from a Video Cloud account
 #===========================================
-def process_account(work_queue: Queue, account_id: str, cms_obj: CMS) -> None:
+def queue_videos(work_queue: Queue, videos: Iterable[dict], checkpoint: Optional[Checkpoint]=None, prefilter: Optional[Callable[[dict], bool]]=None,
+                 put_ids: bool=False) -> None:
+    """
+    Function to add videos to a Queue, skipping videos already processed according to the checkpoint.
+
+    Args:
+        work_queue (Queue): Queue to be filled
+        videos (Iterable[dict]): video objects in created_at order
+        checkpoint (Optional[Checkpoint], optional): Checkpoint to record progress in. Defaults to None.
+        prefilter (Optional[Callable[[dict], bool]], optional): only add videos for which it returns True. Defaults to None.
+        put_ids (bool, optional): add the video IDs instead of the objects. Defaults to False.
+    """
+    for video in videos:
+        if prefilter and not prefilter(video):
+            continue
+        if checkpoint:
+            if video.get('id') in checkpoint.processed_ids:
+                continue
+            checkpoint.add(video['id'], video['created_at'])
+        # workers fetch the full video object for IDs
+        work_queue.put(video.get('id') if put_ids else video)
+
+def process_catalog(work_queue: Queue, account_id: str, checkpoint: Optional[Checkpoint]=None, prefilter: Optional[Callable[[dict], bool]]=None) -> bool:
+    """
+    Function to fill a Queue with the videos of an account from the local catalog instead of the CMS API.
+
+    Args:
+        work_queue (Queue): Queue to be filled with videos
+        account_id (str): Video Cloud account ID
+        checkpoint (Optional[Checkpoint], optional): Checkpoint to resume from and record progress in. Defaults to None.
+        prefilter (Optional[Callable[[dict], bool]], optional): only add videos for which it returns True. Defaults to None.
+
+    Returns:
+        bool: True
+    """
+    catalog = get_catalog()
+    start = checkpoint.position if checkpoint else None
+    num_videos = limit(catalog.count(account_id, start=start), get_args().l)
+    if num_videos <= 0:
+        eprint(f'No videos found in account ID {account_id}\'s catalog.')
+        return True
+
+    synced_at = format_timestamp(catalog.synced_at(account_id) or datetime.now(timezone.utc))
+    eprint(f'Found {num_videos} videos in account ID {account_id}\'s catalog (synced at {synced_at}). Processing them now.')
+
+    videos: Iterable[dict] = catalog.videos(account_id, start=start)
+    if shard := get_args().shard:
+        videos = (video for video in videos if shard.owns(video))
+    queue_videos(work_queue, islice(videos, get_args().l or None), checkpoint=checkpoint, prefilter=prefilter)
+    return True
+
+def catalog_usable(cms_obj: CMS, account_id: str) -> bool:
+    """
+    Function to check if the videos of an account can be taken from the local catalog (--catalog).
+
+    Returns:
+        bool: True if the catalog was synced recently enough, False otherwise
+    """
+    if get_args().catalog is None:
+        return False
+    if cms_obj.search_query or get_args().delta:
+        eprint('Search queries and --delta are not supported with --catalog -> using the CMS API.')
+        return False
+    if not get_catalog().is_fresh(account_id, max_age=timedelta(minutes=get_args().catalog)):
+        eprint(f'Catalog of account ID {account_id} was not synced within the last {get_args().catalog:g} minutes -> using the CMS API.')
+        return False
+    return True
+
+def process_account(work_queue: Queue, account_id: str, cms_obj: CMS, checkpoint: Optional[Checkpoint]=None, updated_since: Optional[str]=None,
+                    process_callback: Optional[Callable]=None) -> bool:
     """
     Function to fill a Queue with a list of all video IDs in an account.
 
+    The library is split into created_at windows which are walked by multiple threads
+    at the same time (-p), but the videos are added to the queue in created_at order
+    and every video only once. With --catalog the videos come from the local catalog
+    if it's fresh enough.
+
     Args:
         work_queue (Queue): Queue to be filled with IDs
         cms_obj (CMS): CMS class instance
         account_id (str): Video Cloud account ID
+        checkpoint (Optional[Checkpoint], optional): Checkpoint to resume from and record progress in. Defaults to None.
+        updated_since (Optional[str], optional): Only process videos updated at or after this time. Defaults to None.
+        process_callback (Optional[Callable], optional): Callback, used to check the fields it needs (see video_fields). Defaults to None.
+
+    Returns:
+        bool: True if all videos were enumerated without errors, False otherwise
     """
+    queue_failed(work_queue, checkpoint)
+    prefilter = getattr(process_callback, 'prefilter', None)
+    if catalog_usable(cms_obj, account_id):
+        return process_catalog(work_queue, account_id, checkpoint=checkpoint, prefilter=prefilter)
+
     # ok, let's process all videos
-    # get number of videos in account
+    # continue after the last video processed in order if we're resuming
+    start = None
+    if checkpoint and checkpoint.position:
+        start = parse_timestamp(checkpoint.position)
+        eprint(f'Resuming account ID {account_id} with videos created at or after {checkpoint.position}.')
+
+    # only look at videos changed since the last run in delta mode
+    search_query = cms_obj.search_query
+    if updated_since:
+        search_query = ' '.join(filter(None, [search_query, quote(f'+updated_at:{updated_since}..', safe='')]))
+        eprint(f'Only processing videos in account ID {account_id} updated since {updated_since}.')
+
+    # use light video objects if they have all the fields the callback needs
+    fields: Tuple[str, ...] = getattr(process_callback, 'video_fields', ())
+    light = bool(fields) and light_videos_usable(cms_obj, account_id, fields)
+    mac_logger.info('Using %s video objects', 'light' if light else 'full')
+
+    # split the library into windows and get the number of videos in each
+    enumerator = VideoEnumerator(cms_obj, account_id=account_id, search_query=search_query, max_workers=get_args().p or 1, start=start, light=light,
+                                 shard=get_args().shard)
     try:
-        num_videos = cms_obj.GetVideoCount(account_id=account_id)
+        windows = enumerator.windows()
     except RequestException as e:
         eprint(f'Error getting number of videos in account ID {account_id} -> {e}')
-        return
+        return False
 
+    num_videos = sum(window.count for window in windows)
     if num_videos <= 0:
         eprint(f'No videos found in account ID {account_id}\'s library.')
-        return
+        return True
 
     num_videos = limit(num_videos, get_args().l)
 
-    eprint(f'Found {num_videos} videos in account ID {account_id}\'s library. Processing them now.')
-
-    current_offset = 0
-    page_size = min(50, num_videos)
-    retries = 10
-
-    while current_offset < num_videos:
-
-        try:
-            response = cms_obj.GetVideos(account_id=account_id, page_size=page_size, page_offset=current_offset)
-            status = response.status_code
-        except RequestException:
-            response = cast(Response, None)
-            status = -1
-
-        # good result
-        if status in [200,202]:
-            json_data = cast(dict, response.json())
-            # make sure we actually got some data
-            if len(json_data) > 0:
-                # let's put all videos in a queue
-                for video in json_data:
-                    work_queue.put_nowait(video)
-                # reset retries count and increase page offset
-                retries = 10
-                current_offset += page_size
-                try:
-                    current_num_videos = cms_obj.GetVideoCount(account_id=account_id)
-                except RequestException as e:
-                    eprint(f'Warning: error refreshing number of videos in account ID {account_id} -> {e}')
-                else:
-                    if current_num_videos > num_videos:
-                        num_videos = limit(current_num_videos, get_args().l)
-
-            # looks like we got an empty response (it can happen)
-            else:
-                status = -1
-
-        # we hit a retryable error
-        if status == -1:
-            code = response.status_code if response else 'unknown'
-            if retries > 0:
-                eprint(f'Error: problem during API call ({code}).')
-                for remaining in range(5, 0, -1):
-                    sys.stderr.write(f'\rRetrying in {remaining:2d} seconds.')
-                    sys.stderr.flush()
-                    time.sleep(1)
+    if get_args().shard:
+        eprint(f'Found {num_videos} videos in account ID {account_id}\'s library. Processing shard {get_args().shard} of them now.')
+    else:
+        eprint(f'Found {num_videos} videos in account ID {account_id}\'s library. Processing them now.')
 
-                retries -= 1
-                eprint(f'\rRetrying now ({retries} retries left).')
+    # let's put all videos in a queue
+    queue_videos(work_queue, enumerator.videos(windows, limit=get_args().l or 0), checkpoint=checkpoint, prefilter=prefilter,
+                 put_ids=light and bool(prefilter))
 
-            else:
-                eprint(f'Error: fatal failure during API call ({code}).')
-                return
+    # report everything we might have missed
+    for gap in enumerator.gaps:
+        if gap.expected < 0:
+            eprint(f'Warning: could not count the videos created between {gap.window} in account ID {account_id}.')
+            continue
+        eprint(f'Warning: got {gap.received} of {gap.expected} videos created between {gap.window} in account ID {account_id}.')
+    return not enumerator.gaps
 
 #===========================================
 # function to process a single video
@@ -275,28 +942,118 @@ def process_single_video_id(account_id: str, video_id: str, cms_obj: CMS, proces
 
     return True
 
+def get_videos_by_id(account_id: str, video_ids: List[str], cms_obj: CMS) -> List[dict]:
+    """
+    Function to get the video objects for a list of video IDs with one API call per 10 videos.
+    If a call fails the videos are fetched one at a time, so a single missing video doesn't
+    take the others with it.
+
+    Args:
+        account_id (str): the account ID
+        video_ids (List[str]): the video IDs
+        cms_obj (CMS): CMS class instance
+
+    Returns:
+        List[dict]: the video objects which could be fetched
+    """
+    videos = []
+    for index in range(0, len(video_ids), 10):
+        chunk = video_ids[index:index+10]
+        try:
+            response = cms_obj.GetVideo(account_id=account_id, video_id=','.join(str(video_id) for video_id in chunk))
+        except RequestException:
+            response = None
+
+        if response is not None and response.status_code in CMS.success_responses:
+            result = response.json()
+            videos.extend(result if isinstance(result, list) else [result])
+        elif len(chunk) > 1:
+            for video_id in chunk:
+                videos.extend(get_videos_by_id(account_id, [video_id], cms_obj))
+        else:
+            code = 'exception' if response is None else str(response.status_code)
+            eprint(f'Error getting information for video ID {chunk[0]} ({code}).')
+    return videos
+
+def get_video_id(work) -> str:
+    """
+    Returns the ID of a queued video object or video ID.
+    """
+    return str(work.get('id')) if isinstance(work, dict) else str(work)
+
+class WorkQueue(Queue):
+    """
+    Work queue which keeps track of its highest depth and of how long producers were blocked
+    because it was full. With a maxsize producers wait for the workers, so no matter how big
+    the library is only maxsize videos are held in memory.
+    """
+    def __init__(self, maxsize: int=0):
+        """
+        Args:
+            maxsize (int, optional): Maximum number of items in the queue, 0 for unlimited. Defaults to 0.
+        """
+        super().__init__(maxsize=maxsize)
+        self.max_depth = 0
+        self.blocked_time = 0.0
+        self.last_report = 0.0
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Puts an item into the queue, blocks while the queue is full.
+        """
+        if block and self.maxsize > 0 and self.full():
+            start = time.perf_counter()
+            if start - self.last_report > 10.0:
+                self.last_report = start
+                mac_logger.info('Work queue full (%d items) -> waiting for workers', self.maxsize)
+            super().put(item, block, timeout)
+            self.blocked_time += time.perf_counter() - start
+        else:
+            super().put(item, block, timeout)
+        self.max_depth = max(self.max_depth, self.qsize())
+
+    def report(self) -> str:
+        """
+        Returns a summary of the queue depth.
+        """
+        size = self.maxsize or 'unlimited'
+        return f'Work queue: max depth {self.max_depth} of {size}, producers waited {self.blocked_time:.1f} seconds for workers.'
+
 class Worker(Thread):
     """
     Worker class for multithreading using queues.
     """
-    def __init__(self, queue:Queue, cms_obj: CMS, account_id: str, process_callback: Callable, *args, **kwargs):
+    # seconds to wait for more videos to fill a batch
+    batch_wait = 0.5
+
+    def __init__(self, queue:Queue, cms_obj: CMS, account_id: str, process_callback: Callable, *args, checkpoint: Optional[Checkpoint]=None,
+                 context: Optional[AccountContext]=None, limiter: Optional[AIMDLimiter]=None, **kwargs):
         """
         Args:
             queue (Queue): Queue to process.
             cms_obj (CMS): CMS instance to use.
             account_id (str): Brightcove account ID.
             process_callback (Callable): Callback function which processes the data.
+            checkpoint (Optional[Checkpoint], optional): Checkpoint to record processed videos in. Defaults to None.
+            context (Optional[AccountContext], optional): API instances to use in callbacks. Defaults to None.
+            limiter (Optional[AIMDLimiter], optional): Adaptive limit for the number of active workers. Defaults to None.
         """
         super().__init__(*args, **kwargs)
         self.queue = queue
         self.cms_obj = cms_obj
         self.account_id = account_id
         self.process_callback = process_callback
+        self.checkpoint = checkpoint
+        self.context = context
+        self.limiter = limiter
 
     def run(self):
         """
         Processes the queue.
         """
+        if self.context:
+            self.context.activate()
+        batch_size = getattr(self.process_callback, 'batch_size', 0)
         keep_working = True
         while keep_working:
             try:
@@ -304,20 +1061,178 @@ class Worker(Thread):
             except Empty:
                 mac_logger.info('Queue empty -> exiting worker thread')
                 return
+            # batch callbacks get everything queued up to the batch size
+            items = [work]
+            while batch_size and work != 'EXIT' and len(items) < batch_size:
+                try:
+                    work = self.queue.get(timeout=self.batch_wait)
+                except Empty:
+                    break
+                items.append(work)
             # is it the exit signal?
             if work == 'EXIT':
                 mac_logger.info('EXIT found -> exiting worker thread')
                 keep_working = False
+                items.pop()
             # do whatever work you have to do on work
-            elif isinstance(work, dict):
+            processed_ids: Set[str] = set()
+            if items:
+                if self.limiter:
+                    self.limiter.acquire()
+                if batch_size:
+                    processed_ids = self.process_batch(items)
+                elif self.process(items[0]):
+                    processed_ids = { get_video_id(items[0]) }
+                if self.limiter:
+                    self.limiter.release()
+            for item in items:
+                checkpoint_done(self.checkpoint, get_video_id(item), failed=get_video_id(item) not in processed_ids)
+                self.queue.task_done()
+            if not keep_working:
+                self.queue.task_done()
+
+    def process(self, work) -> bool:
+        """
+        Runs the callback for a video object or video ID. Returns False if it failed.
+        """
+        if isinstance(work, dict):
+            try:
                 self.process_callback(work)
+            except Exception as e:
+                eprint(f'Error executing callback for video ID {work.get("id")}: {e}')
+                return False
+            return True
+        return process_single_video_id(account_id=self.account_id,
+                                       video_id=work,
+                                       cms_obj=self.cms_obj,
+                                       process_callback=self.process_callback)
+
+    def process_batch(self, items: list) -> Set[str]:
+        """
+        Runs the callback for a batch of video objects or video IDs. Returns the IDs of the videos processed.
+        """
+        videos = [item for item in items if isinstance(item, dict)]
+        if video_ids := [item for item in items if not isinstance(item, dict)]:
+            videos.extend(get_videos_by_id(account_id=self.account_id, video_ids=video_ids, cms_obj=self.cms_obj))
+        if not videos:
+            return set()
+        try:
+            self.process_callback(videos)
+        except Exception as e:
+            eprint(f'Error executing callback for a batch of {len(videos)} videos: {e}')
+            return set()
+        return { get_video_id(video) for video in videos }
+
+class AsyncWorker(Thread):
+    """
+    Worker class running async callbacks on its own event loop, many at the same time.
+    """
+    def __init__(self, queue:Queue, account_id: str, process_callback: Callable, max_tasks: int, *args, checkpoint: Optional[Checkpoint]=None,
+                 context: Optional[AccountContext]=None, **kwargs):
+        """
+        Args:
+            queue (Queue): Queue to process.
+            account_id (str): Brightcove account ID.
+            process_callback (Callable): Async callback function which processes the data.
+            max_tasks (int): Maximum number of callbacks running at the same time.
+            checkpoint (Optional[Checkpoint], optional): Checkpoint to record processed videos in. Defaults to None.
+            context (Optional[AccountContext], optional): API instances to use in callbacks. Defaults to None.
+        """
+        super().__init__(*args, **kwargs)
+        self.queue = queue
+        self.account_id = account_id
+        self.process_callback = process_callback
+        self.max_tasks = max_tasks
+        self.checkpoint = checkpoint
+        self.context = context
+
+    def run(self):
+        """
+        Processes the queue.
+        """
+        if self.context:
+            self.context.activate()
+        asyncio.run(self.__run())
+
+    async def __run(self):
+        """
+        Starts a task for every video in the queue until the exit signal is found.
+        """
+        semaphore = asyncio.Semaphore(self.max_tasks)
+        tasks = set()
+        try:
+            while True:
+                await semaphore.acquire()
+                work = await asyncio.get_running_loop().run_in_executor(None, self.queue.get)
+                if work == 'EXIT':
+                    mac_logger.info('EXIT found -> exiting async worker thread')
+                    self.queue.task_done()
+                    break
+                task = asyncio.create_task(self.__process(work))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            await AsyncSession.close()
+
+    async def __process(self, work):
+        """
+        Runs the callback for a video object or video ID.
+        """
+        video_id = get_video_id(work)
+        failed = True
+        try:
+            if isinstance(work, dict):
+                await self.process_callback(work)
+                failed = False
             else:
-                process_single_video_id(account_id=self.account_id,
-                                        video_id=work,
-                                        cms_obj=self.cms_obj,
-                                        process_callback=self.process_callback)
+                response = await get_async_cms().GetVideo(video_id=video_id, account_id=self.account_id)
+                if response.status_code in CMS.success_responses:
+                    await self.process_callback(response.json())
+                    failed = False
+                else:
+                    eprint(f'Error getting information for video ID {video_id} ({response.status_code}).')
+        except Exception as e:
+            eprint(f'Error executing callback for video ID {video_id}: {e}')
+        finally:
+            checkpoint_done(self.checkpoint, video_id, failed=failed)
             self.queue.task_done()
 
+def start_workers(queue: Queue, account_id: str, cms_obj: CMS, process_callback: Callable, num_workers: int, checkpoint: Optional[Checkpoint]=None,
+                  context: Optional[AccountContext]=None, limiter: Optional[AIMDLimiter]=None) -> int:
+    """
+    Function to start the worker threads for a queue. Async callbacks are run by a single
+    thread with up to num_workers callbacks at the same time. The limiter only applies to
+    worker threads.
+
+    Returns:
+        int: number of exit signals which have to be put into the queue
+    """
+    if inspect.iscoroutinefunction(process_callback):
+        AsyncWorker(queue=queue, account_id=account_id, process_callback=process_callback, max_tasks=num_workers, checkpoint=checkpoint, context=context).start()
+        return 1
+
+    for _ in range(num_workers):
+        Worker(queue=queue, cms_obj=cms_obj, account_id=account_id, process_callback=process_callback, checkpoint=checkpoint, context=context,
+               limiter=limiter).start()
+    return num_workers
+
+def run_async_callback(process_callback: Callable) -> Callable:
+    """
+    Function to wrap an async callback so it can be called like a regular one.
+    """
+    @functools.wraps(process_callback)
+    def run(video: dict) -> None:
+        async def run_and_close():
+            try:
+                await process_callback(video)
+            finally:
+                await AsyncSession.close()
+        asyncio.run(run_and_close())
+    return run
+
 #===========================================
 # this is the main loop to process videos
 #===========================================
@@ -350,15 +1265,46 @@ def process_input(account_info_file: str='', process_callback: Callable=list_vid
         account_id_list = get_accounts(get_args().t or account_id)
     account_id = account_id_list[0]
 
-    get_oauth(account_id, client_id, client_secret)
-    get_cms(oauth=get_oauth(), query=get_args().q)
-    get_di(oauth=get_oauth())
-    get_opts(opts=opts)
+    # optionally share access tokens with other processes, "token_cache" can be true or a filename
+    token_cache = None
+    if cache_option := opts.get('token_cache'):
+        token_cache = TokenCache(cache_option if isinstance(cache_option, str) else '')
 
     # if async is enabled use more than one thread
     max_threads = get_args().a or 1
     mac_logger.info('Using %d thread(s) for processing', max_threads)
 
+    # every worker thread plus the page fetchers of every account need their own connection per host
+    # and so does every sub-resource fetching thread
+    num_accounts = min(max(1, get_args().accounts), len(account_id_list))
+    num_resources = len(getattr(process_callback, 'video_resources', None) or {})
+    configure_connection_pools(pool_maxsize=max(10, (max_threads*(1+num_resources)+(get_args().p or 1)+1)*num_accounts))
+
+    # optionally cache read-mostly API responses between runs, "response_cache" can be true or a filename
+    if cache_option := opts.get('response_cache'):
+        Base.response_cache = DiskResponseCache(cache_option if isinstance(cache_option, str) else '', ttl=opts.get('response_cache_ttl', 300))
+
+    get_oauth(account_id, client_id, client_secret, token_cache)
+    get_cms(oauth=get_oauth(), query=get_args().q)
+    get_di(oauth=get_oauth())
+    get_opts(opts=opts)
+
+    # CPU heavy callbacks can run in a pool of processes
+    if getattr(process_callback, 'collect', None) and get_args().processes:
+        get_process_pool(max_workers=get_args().processes)
+    process_callback = run_process_stage(process_callback)
+
+    # sub-resources declared by the callback are fetched at the same time by a pool of threads
+    if num_resources:
+        get_prefetch_pool(max_workers=max_threads*num_resources*num_accounts)
+    process_callback = run_prefetch_stage(process_callback)
+
+    # throttle all workers together instead of running into 429 responses
+    if get_args().r:
+        for api in (CMS, DynamicIngest):
+            api.set_rate_limit(rate=get_args().r)
+        mac_logger.info('Rate limited to %.2f requests per second per API host', get_args().r)
+
     #=========================================================
     #=========================================================
     # check if we should process a specific video ID
@@ -366,11 +1312,12 @@ def process_input(account_info_file: str='', process_callback: Callable=list_vid
     #=========================================================
     if video_id:
         print(f'Processing video ID {video_id} now.')
+        if inspect.iscoroutinefunction(process_callback):
+            process_callback = run_async_callback(process_callback)
+        elif getattr(process_callback, 'batch_size', 0):
+            process_callback = run_batch_callback(process_callback)
         return process_single_video_id(account_id, video_id, get_cms(), process_callback)
 
-    # create the work queue because everything below uses it
-    work_queue:Queue = Queue(maxsize=0)
-
     #=========================================================
     #=========================================================
     # check if we should process a given list of videos
@@ -387,24 +1334,47 @@ def process_input(account_info_file: str='', process_callback: Callable=list_vid
         video_list = opts.get('video_ids', [])
 
     if video_list and video_list[0] != 'all':
+        # only keep the videos of the shard
+        if shard := get_args().shard:
+            video_list = [video_id_ for video_id_ in video_list if shard.owns_id(video_id_)]
+            eprint(f'Processing shard {shard} of the videos in file.')
         # limit number of videos to be processed if a limit was provided using -l
         num_videos = limit(len(video_list), get_args().l)
+        work_queue = WorkQueue(maxsize=max(0, get_args().w))
+        checkpoint = get_checkpoint(account_id)
+        if checkpoint.finished:
+            eprint('All videos in file have been processed already.')
+            return True
+        # continue after the last video processed in order if we're resuming
+        skip = int(checkpoint.position) + 1 if checkpoint.position else 0
+        if skip or checkpoint.processed_ids:
+            eprint(f'Resuming after {skip} videos.')
         eprint(f'Found {num_videos} videos in file. Processing them now.')
-        # let's put all video IDs in a queue
-        for video_id_ in video_list:
-            work_queue.put_nowait(video_id_)
         # starting worker threads on queue processing
-        num_threads = min(max_threads, num_videos)
+        limiter = get_limiter(min(max_threads, num_videos), account_id)
+        num_threads = start_workers(queue=work_queue,
+                                    account_id=account_id,
+                                    cms_obj=get_cms(),
+                                    process_callback=process_callback,
+                                    num_workers=min(max_threads, num_videos),
+                                    checkpoint=checkpoint,
+                                    limiter=limiter)
+        # let's put all video IDs in a queue
+        queue_failed(work_queue, checkpoint)
+        for index, video_id_ in enumerate(video_list[:num_videos]):
+            if index < skip or str(video_id_) in checkpoint.processed_ids:
+                continue
+            checkpoint.add(str(video_id_), str(index))
+            work_queue.put(video_id_)
         for _ in range(num_threads):
-            work_queue.put_nowait("EXIT")
-            Worker(	queue=work_queue,
-                    cms_obj=get_cms(),
-                    account_id=account_id,
-                    process_callback=process_callback).start()
+            work_queue.put("EXIT")
         # now we wait until the queue has been processed
-        if not work_queue.empty():
-            work_queue.join()
+        work_queue.join()
+        finish_checkpoint(checkpoint)
+        release_limiter(limiter, account_id)
 
+        if get_args().s:
+            eprint(work_queue.report())
         return True
 
     #=========================================================
@@ -413,28 +1383,79 @@ def process_input(account_info_file: str='', process_callback: Callable=list_vid
     #=========================================================
     #=========================================================
 
-    for account_id in account_id_list:
-        get_oauth().account_id = account_id
-        # start thread to fill the queue
-        account_page_thread = Thread(target=process_account, args=[work_queue, account_id, get_cms()])
-        account_page_thread.start()
-
-        # starting worker threads on queue processing
-        for _ in range(max_threads):
-            Worker(queue=work_queue, cms_obj=get_cms(), account_id=account_id, process_callback=process_callback).start()
-
-        # first wait for the queue filling thread to finish
-        account_page_thread.join()
+    # process accounts one after another or, with their own API instances, in parallel
+    num_accounts = min(max(1, get_args().accounts), len(account_id_list))
+    if num_accounts == 1:
+        for account_id in account_id_list:
+            get_oauth().account_id = account_id
+            process_whole_account(account_id, process_callback, max_threads)
+    else:
+        eprint(f'Processing {num_accounts} accounts at the same time.')
+        with ThreadPoolExecutor(max_workers=num_accounts, thread_name_prefix='account') as executor:
+            futures = [executor.submit(process_whole_account, account_id, process_callback, max_threads, True) for account_id in account_id_list]
+            for account_id, future in zip(account_id_list, futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    eprint(f'Error processing account ID {account_id}: {e}')
+    return True
 
-        # once the queue is filled with videos add exit signals
-        for _ in range(max_threads):
-            work_queue.put_nowait("EXIT")
+def process_whole_account(account_id: str, process_callback: Callable, max_threads: int, isolated: bool=False) -> None:
+    """
+    Function to process all videos in an account.
 
-        # now we wait until the queue has been processed
-        if not work_queue.empty():
-            work_queue.join()
+    Args:
+        account_id (str): the account ID
+        process_callback (Callable): the callback function used for actual processing
+        max_threads (int): number of worker threads
+        isolated (bool, optional): use separate API instances for the account, so accounts can be processed in parallel. Defaults to False.
+    """
+    context = AccountContext(account_id) if isolated else None
+    checkpoint = get_checkpoint(account_id)
+    if checkpoint.finished:
+        eprint(f'All videos in account ID {account_id} have been processed already.')
+        return
 
-    return True
+    # in delta mode the next run picks up everything updated from now on
+    delta_mark = get_delta_mark(account_id) if get_args().delta else None
+    scan_start = format_timestamp(datetime.now(timezone.utc))
+
+    cms_obj = context.cms if context else get_cms()
+    work_queue = WorkQueue(maxsize=max(0, get_args().w))
+
+    # start thread to fill the queue
+    enumerated: List[bool] = []
+    account_page_thread = Thread(target=lambda: enumerated.append(process_account(work_queue, account_id, cms_obj, checkpoint,
+                                                                                  delta_mark.value if delta_mark else None, process_callback)))
+    account_page_thread.start()
+
+    # starting worker threads on queue processing
+    limiter = get_limiter(max_threads, account_id)
+    num_threads = start_workers(queue=work_queue, account_id=account_id, cms_obj=cms_obj, process_callback=process_callback,
+                                num_workers=max_threads, checkpoint=checkpoint, context=context, limiter=limiter)
+
+    # first wait for the queue filling thread to finish
+    account_page_thread.join()
+
+    # once the queue is filled with videos add exit signals
+    for _ in range(num_threads):
+        work_queue.put("EXIT")
+
+    # now we wait until the queue has been processed
+    work_queue.join()
+    # a run with gaps or enumeration errors must not be marked as finished
+    finish_checkpoint(checkpoint, complete=bool(enumerated and enumerated[0]))
+    release_limiter(limiter, account_id)
+    # an account is only complete if all videos were enumerated without gaps and processed without errors
+    complete = bool(enumerated and enumerated[0]) and not checkpoint.failed_ids
+    if complete:
+        get_complete_accounts().append(account_id)
+    # videos missed because of gaps or errors would fall behind the mark and never be processed
+    if delta_mark and complete:
+        delta_mark.set(scan_start)
+
+    if get_args().s:
+        eprint(f'Account ID {account_id}: {work_queue.report()}')
 
 #===========================================
 # parse args and do the thing
@@ -450,9 +1471,34 @@ def main(process_func: Callable) -> None:
     # parse the args
     get_args()
 
+    # combine the outputs of a sharded run instead of processing videos
+    if get_args().merge_shards:
+        sys.exit(0 if merge_shards(get_args().o or 'report.csv') else 1)
+
+    # only scripts which keep the results of earlier runs support incremental runs
+    for option in ('delta', 'resume'):
+        if getattr(get_args(), option) and not getattr(process_func, f'supports_{option}', False):
+            eprint(f'{path.basename(sys.argv[0])} does not support --{option}.')
+            sys.exit(2)
+
+    # collect latency and error statistics for all API calls
+    stats = EndpointStats()
+    if get_args().s:
+        add_request_hook(stats)
+
     # go through the library and do stuff
     process_input(account_info_file=get_args().i, process_callback=process_func, video_id=get_args().v)
 
+    if pool := get_process_pool():
+        pool.shutdown()
+
+    if prefetch_pool := get_prefetch_pool():
+        prefetch_pool.shutdown()
+
+    if get_args().s:
+        remove_request_hook(stats)
+        stats.print_report()
+
 #===========================================
 # only run code if it's not imported
 #===========================================
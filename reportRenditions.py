@@ -1,21 +1,20 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, video_resources, Video, incremental
 #=============================================
 # callback to find the aspect ratio of videos
 #=============================================
-def report_renditions(video: dict) -> None:
+@incremental(resume=True)
+@video_resources('renditions', sources=lambda cms, video: cms.GetVideoSources(video_id=video.get('id')) if video.get('delivery_type') == 'dynamic_origin' else None)
+def report_renditions(video: Video) -> None:
     """
     This will print out the aspectratio of a video.
     """
     video_id = str(video.get('id'))
     delivery_type = video.get('delivery_type')
-    source_w, source_h, response = None, None, None
+    source_w, source_h = None, None
 
-    if delivery_type == 'static_origin':
-        response = get_cms().GetRenditionList(video_id=video_id)
-    elif delivery_type == 'dynamic_origin':
-        response = get_cms().GetDynamicRenditions(video_id=video_id)
-    else:
+    response = video.resource('renditions')
+    if response is None:
         return
 
     if response.status_code not in get_cms().success_responses:
@@ -31,7 +30,7 @@ def report_renditions(video: dict) -> None:
                 results[rendition.get('size')] = [source_w, source_h, rendition.get('size'), 'MP4' if rendition.get('video_container') == 'MP4' else 'HLS/DASH' ]
 
     if delivery_type == 'dynamic_origin':
-        response = get_cms().GetVideoSources(video_id=video_id)
+        response = video.resource('sources')
         if response.status_code in get_cms().success_responses:
             for rendition in response.json():
                 if rendition.get('container') == 'MP4':
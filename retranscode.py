@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms, get_di
+from mackee import main, get_cms, get_di, incremental
 
 #==========================================================
 # retranscode video and use MP4 or FLV if it has no master
 #==========================================================
+@incremental(resume=True)
 def retranscode(video: dict):
     """
     This will retranscode a video using the digital master if it exists.
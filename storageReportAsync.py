@@ -1,21 +1,21 @@
 #!/usr/bin/env python3
-import csv
 import time
-from threading import Lock
+from typing import Optional
 from requests.exceptions import RequestException
-from mackee import main, get_cms, get_args
-from brightcove.utils import list_to_csv, eprint, is_shared_by
+from mackee import main, get_cms, get_args, get_merge_key, incremental
+from mackee import Video, video_resources, get_renditions
+from brightcove.utils import CSVAppender, eprint, is_shared_by
 from brightcove.utils import TimeString
 from brightcove.utils import SimpleProgressDisplay
 
-data_lock = Lock()
-row_list = [('account_id','video_id','delivery_type','master_size','hls_renditions_size','mp4_renditions_size','audio_renditions_size', 'flv_renditions_size')]
+header = ('account_id','video_id','delivery_type','master_size','hls_renditions_size','mp4_renditions_size','audio_renditions_size', 'flv_renditions_size')
+report: Optional[CSVAppender] = None
 show_progress = SimpleProgressDisplay(steps=100, add_info='videos processed')
 
 #===========================================
 # function to get size of master
 #===========================================
-def get_master_storage(video: dict) -> int:
+def get_master_storage(video: Video) -> int:
     """
     Function to get the size of the digital master for a video.
 
@@ -24,21 +24,20 @@ def get_master_storage(video: dict) -> int:
     if is_shared_by(video):
         return 0
 
-    if video.get('has_digital_master'):
-        try:
-            response = get_cms().GetDigitalMasterInfo(video_id=video.get('id'))
-        except RequestException:
-            return -1
-        else:
-            if response.status_code == 200:
-                return int(response.json().get('size', 0))
-            return -1
-    return 0
+    try:
+        response = video.resource('digital_master')
+    except RequestException:
+        return -1
+    if response is None:
+        return 0
+    if response.status_code == 200:
+        return int(response.json().get('size', 0))
+    return -1
 
 #===========================================
 # function to get size of all renditions
 #===========================================
-def get_rendition_sizes(video: dict) -> dict:
+def get_rendition_sizes(video: Video) -> dict:
     """
     Function to get the sizes of all rendtions for a video.
 
@@ -62,19 +61,15 @@ def get_rendition_sizes(video: dict) -> dict:
         'video': 'hls_renditions_size',
     }
 
-    response = None
     delivery_type = video.get('delivery_type')
     video_id = video.get('id')
 
     try:
-        if delivery_type == 'static_origin':
-            response = get_cms().GetRenditionList(video_id=video_id)
-        elif delivery_type == 'dynamic_origin':
-            response = get_cms().GetDynamicRenditions(video_id=video_id)
-        else:
-            return sizes
+        response = video.resource('renditions')
     except RequestException:
         return { key:-1 for key in sizes }
+    if response is None:
+        return sizes
 
     if response and response.ok:
         renditions = response.json()
@@ -97,18 +92,26 @@ def get_rendition_sizes(video: dict) -> dict:
         # if it's Dynamic Delivery we need to get MP4 sizes from the sources endpoint
         if delivery_type == 'dynamic_origin' and sizes['mp4_renditions_size'] == 0:
             try:
-                response = get_cms().GetVideoSources(video_id=video_id)
+                response = video.resource('sources')
             except RequestException:
                 sizes['mp4_renditions_size'] = -1
             else:
-                if response.status_code in get_cms().success_responses:
+                if response is not None and response.status_code in get_cms().success_responses:
                     sizes['mp4_renditions_size'] += sum(set(rendition.get('size', 0) for rendition in response.json() if rendition.get('container') == 'MP4'))
     return sizes
 
 #===========================================
 # callback getting storage sizes
 #===========================================
-def find_storage_size(video: dict) -> None:
+# all sub-resources are fetched at the same time before the callback runs,
+# shared videos don't have any and sources are only needed for Dynamic Delivery
+@video_resources(
+    digital_master=lambda cms, video: cms.GetDigitalMasterInfo(video_id=video.get('id')) if video.get('has_digital_master') and not is_shared_by(video) else None,
+    renditions=lambda cms, video: get_renditions(cms, video) if not is_shared_by(video) else None,
+    sources=lambda cms, video: cms.GetVideoSources(video_id=video.get('id')) if video.get('delivery_type') == 'dynamic_origin' and not is_shared_by(video) else None,
+)
+@incremental(delta=True, resume=True)
+def find_storage_size(video: Video) -> None:
     """
     Function to add a list with all storage info for a video to the global report list.
     """
@@ -120,24 +123,25 @@ def find_storage_size(video: dict) -> None:
     }
     row_dict.update(get_rendition_sizes(video))
 
-    # add a new row to the CSV data
-    with data_lock:
-        row_list.append((row_dict.values()))
-        show_progress()
+    # write a new row to the CSV file right away, so it's kept if the script dies
+    report.writerow(row_dict.values())
+    show_progress()
 
 #===========================================
 # only run code if it's not imported
 #===========================================
 if __name__ == '__main__':
     s = time.perf_counter()
-    main(find_storage_size)
-    show_progress(force_display=True)
-
-    #write list to file
+    # rows are appended to the output of the interrupted run when resuming
+    # and merged into the existing report in delta mode
     try:
-        list_to_csv(row_list, get_args().o)
-    except (OSError, csv.Error) as e:
-        eprint(f'\n{e}')
+        report = CSVAppender(get_args().o, header=header, append=get_args().resume, merge_key=get_merge_key())
+    except OSError as e:
+        eprint(e)
+    else:
+        main(find_storage_size)
+        report.close()
+    show_progress(force_display=True)
 
     elapsed = time.perf_counter() - s
     eprint(f'\n{__file__} executed in {TimeString.from_seconds(int(elapsed))}.')
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+import sys
+from mackee import main, get_args, get_oauth, get_catalog, get_complete_accounts, video_batch, incremental
+from brightcove.Catalog import VideoCatalog
+from brightcove.utils import SimpleProgressDisplay, SimpleTimer, eprint
+
+# some globals
+sync_start = VideoCatalog.now()
+show_progress = SimpleProgressDisplay(steps=1000, add_info='videos synced')
+
+#===========================================
+# callback storing videos in the catalog
+#===========================================
+@incremental(delta=True, resume=True)
+@video_batch(size=500)
+def sync_videos(videos: list) -> None:
+    """
+    Function to store a batch of video objects in the local catalog.
+
+    Args:
+        videos (list): video objects obtained from the CMS API.
+    """
+    account_id = get_oauth().account_id
+    get_catalog().store(account_id, videos, synced_at=sync_start)
+    show_progress(len(videos))
+
+#===========================================
+# only run code if it's not imported
+#===========================================
+if __name__ == '__main__':
+    # the catalog is synced from the CMS API, not from itself
+    if get_args().catalog is not None:
+        eprint('syncCatalog.py does not support --catalog.')
+        sys.exit(2)
+
+    with SimpleTimer():
+        main(sync_videos)
+        show_progress(force_display=True)
+
+        # only a sync of all videos can tell which videos were deleted, so --delta and
+        # resumed syncs are partial like everything else which doesn't get all videos
+        partial = get_args().q or get_args().l or get_args().x or get_args().v or get_args().shard or get_args().delta or get_args().resume
+        if partial:
+            eprint('\nPartial sync: the catalog was updated but not marked as synced.')
+        else:
+            for account_id in get_complete_accounts():
+                removed = get_catalog().prune(account_id, synced_before=sync_start)
+                eprint(f'\nRemoved {removed} deleted videos of account ID {account_id} from the catalog.')
+                get_catalog().set_synced(account_id, sync_start)
+                eprint(f'\nAccount ID {account_id}: {get_catalog().count(account_id)} videos in catalog {get_catalog().filename}.')
@@ -1,33 +1,24 @@
 """
 Example script to update content type for videos in an account
 """
-from mackee import main, get_oauth
-from brightcove.utils import static_vars
-from brightcove.Audience import Audience
-
-# get Audience API instance
-@static_vars(aapi=None)
-def get_audience() -> Audience:
-    """
-    Returns an Audience API instance. Creates one if it doesn't exist yet.
-    """
-    if not get_audience.aapi:
-        get_audience.aapi = Audience(get_oauth())
-    return get_audience.aapi
+from mackee import main, get_async_api, incremental
+from brightcove.AsyncAPI import AsyncAudience
 
 #===========================================
 # callback to set content type for videos
 #===========================================
-def update_content_type(video: dict):
+@incremental(resume=True)
+async def update_content_type(video: dict):
     """
-    Updates content type for a video.
+    Updates content type for a video. Runs as async callback, so -a sets the number of
+    API calls in flight instead of the number of threads.
     """
     # get video ID and specify content type
     video_id = video.get('id')
     content_type = 'my-type-here'
 
     # make API call
-    response = get_audience().SetContentType(video_id=video_id, content_type=content_type)
+    response = await get_async_api(AsyncAudience).SetContentType(video_id=video_id, content_type=content_type)
 
     # check if we have a success response
     if response.status_code in [200,202]:
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 from typing import Union
-import time
 import sys
 import argparse
 import pandas
 from brightcove.CMS import CMS
 from brightcove.OAuth import OAuth
+from brightcove.Retry import RetryPolicy, ALL_METHODS
 from brightcove.utils import load_account_info, normalize_id
 
 # names of the columns in the xls file
@@ -27,14 +27,6 @@ def update_video(cms_api: CMS, vid_id: str, update_data: Union[str, dict]) -> No
 		response = cms_api.UpdateVideo(video_id=vid_id, json_body=update_data).status_code
 		print(f'Updating video ID "{vid_id}": {response}')
 
-		if response==429:
-			for remaining in range(3, 0, -1):
-				sys.stderr.write(f'\rRetrying in {remaining:2d} seconds.')
-				sys.stderr.flush()
-				time.sleep(1)
-			# let's call ourself again, shall we?
-			update_video(cms_api=cms_api, vid_id=vid_id, update_data=update_data)
-
 # init the argument parsing
 parser = argparse.ArgumentParser(prog=sys.argv[0])
 parser.add_argument('--config', metavar='<config filename>', type=str, help='Name and path of account config information file')
@@ -63,6 +55,8 @@ account_id = args.account or account_id
 
 # create a CMS API instance
 cms = CMS( oauth=OAuth(account_id=account_id,client_id=client_id, client_secret=client_secret) )
+# setting a reference ID is idempotent, so PATCH requests can be retried as well
+cms.retry_policy = RetryPolicy(retry_methods=ALL_METHODS)
 
 # if we have an xls let's get going
 if args.xls:
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
-from mackee import main, get_cms
+from mackee import main, get_cms, incremental
 
 #===========================================
 # callback to update text track labels to
 # match the language
 #===========================================
+@incremental(resume=True)
 def update_tt_label(video: dict):
     """
     This will update a text track's label to be the same as the language.